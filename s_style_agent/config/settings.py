@@ -81,6 +81,9 @@ class Settings:
         # システム設定
         if os.getenv("DEBUG"):
             self.system.debug = os.getenv("DEBUG").lower() in ("true", "1", "yes")
+        if os.getenv("TRACE_ENABLED"):
+            # false にすると対応する while ループをバイトコードで実行（反復ごとの実行トレースは残らない）
+            self.system.trace_enabled = os.getenv("TRACE_ENABLED").lower() in ("true", "1", "yes")
         if os.getenv("LANGSMITH_PROJECT"):
             self.system.langsmith_project = os.getenv("LANGSMITH_PROJECT")
 
@@ -4,8 +4,9 @@ S式エージェント 共通サービス
 CLI/TUI両方で使用される共通機能を提供
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
+import functools
 from datetime import datetime
 
 from langchain_openai import ChatOpenAI
@@ -18,6 +19,29 @@ from ..core.parser import parse_s_expression
 from ..core.trace_logger import configure_trace_logging, TraceLogger
 
 
+@functools.lru_cache(maxsize=2)
+def _tool_catalog(mcp_initialized: bool) -> Tuple[Dict[str, str], ...]:
+    """MCP初期化状態ごとのツール一覧（キャッシュ済み）"""
+    builtin_tools = (
+        {"name": "calc", "description": "数式計算", "type": "builtin", "status": "available"},
+        {"name": "notify", "description": "通知表示", "type": "builtin", "status": "available"},
+        {"name": "math", "description": "記号数学計算", "type": "builtin", "status": "available"},
+        {"name": "par", "description": "並列実行", "type": "builtin", "status": "available"},
+        {"name": "seq", "description": "順次実行", "type": "builtin", "status": "available"},
+    )
+    
+    mcp_tools = ()
+    if mcp_initialized:
+        mcp_tools = ({
+            "name": "search", 
+            "description": "Brave検索", 
+            "type": "mcp", 
+            "status": "available"
+        },)
+    
+    return builtin_tools + mcp_tools
+
+
 class AgentService:
     """S式エージェントの共通サービス"""
     
@@ -537,24 +561,8 @@ S式の実行でエラーが発生しました。エラー内容を分析して
         Returns:
             ツール情報リスト
         """
-        builtin_tools = [
-            {"name": "calc", "description": "数式計算", "type": "builtin", "status": "available"},
-            {"name": "notify", "description": "通知表示", "type": "builtin", "status": "available"},
-            {"name": "math", "description": "記号数学計算", "type": "builtin", "status": "available"},
-            {"name": "par", "description": "並列実行", "type": "builtin", "status": "available"},
-            {"name": "seq", "description": "順次実行", "type": "builtin", "status": "available"},
-        ]
-        
-        mcp_tools = []
-        if self.mcp_initialized:
-            mcp_tools.append({
-                "name": "search", 
-                "description": "Brave検索", 
-                "type": "mcp", 
-                "status": "available"
-            })
-        
-        return builtin_tools + mcp_tools
+        # キャッシュ共有のため呼び出し側には各エントリのコピーを返す
+        return [dict(tool) for tool in _tool_catalog(self.mcp_initialized)]
     
     async def test_tools(self) -> Dict[str, Any]:
         """
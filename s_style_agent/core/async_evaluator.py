@@ -11,8 +11,8 @@ from langchain_openai import ChatOpenAI
 from langsmith import traceable
 
 from .parser import parse_s_expression, SExpression
+from .bytecode import check_max_iterations
 from ..config.settings import settings
-import sympy as sp
 
 
 class SecurityError(Exception):
@@ -20,51 +20,58 @@ class SecurityError(Exception):
     pass
 
 
+# 未定義変数を表す番兵（None を値として束縛できるよう区別する）
+_UNBOUND = object()
+
+
 class AsyncEnvironment:
-    """非同期対応の変数束縛管理クラス"""
+    """非同期対応の変数束縛管理クラス
+    
+    束縛の読み書きは await を挟まない単一の辞書操作で、イベントループ上では
+    他のコルーチンに割り込まれないためロックを取らない。
+    """
     
     def __init__(self, parent: Optional['AsyncEnvironment'] = None):
         self.parent = parent
         self.bindings: Dict[str, Any] = {}
-        self._lock = asyncio.Lock()
     
     async def define(self, var: str, val: Any) -> None:
-        """変数を定義（スレッドセーフ）"""
-        async with self._lock:
-            self.bindings[var] = val
+        """変数を定義"""
+        self.bindings[var] = val
     
     async def set(self, var: str, val: Any) -> None:
         """既存変数に値を設定（スコープチェーン対応）"""
-        async with self._lock:
-            if var in self.bindings:
-                self.bindings[var] = val
+        env = self
+        while env is not None:
+            if var in env.bindings:
+                env.bindings[var] = val
                 return
-        
-        if self.parent:
-            await self.parent.set(var, val)
-        else:
-            raise NameError(f"Name '{var}' is not defined")
+            env = env.parent
+        raise NameError(f"Name '{var}' is not defined")
     
     async def lookup(self, var: str) -> Any:
         """変数を検索"""
-        async with self._lock:
-            if var in self.bindings:
-                return self.bindings[var]
-        
-        if self.parent:
-            return await self.parent.lookup(var)
-        else:
+        value = self.get(var, _UNBOUND)
+        if value is _UNBOUND:
             raise NameError(f"Name '{var}' is not defined")
+        return value
+    
+    def get(self, var: str, default: Any = None) -> Any:
+        """変数を検索（未定義なら default、await 不要の同期版）"""
+        env = self
+        while env is not None:
+            value = env.bindings.get(var, _UNBOUND)
+            if value is not _UNBOUND:
+                return value
+            env = env.parent
+        return default
     
     async def get_all_bindings(self) -> Dict[str, Any]:
         """すべての変数束縛を取得（デバッグ用）"""
         all_bindings = {}
         if self.parent:
             all_bindings.update(await self.parent.get_all_bindings())
-        
-        async with self._lock:
-            all_bindings.update(self.bindings)
-        
+        all_bindings.update(self.bindings)
         return all_bindings
 
 
@@ -195,10 +202,8 @@ class AsyncContextualEvaluator:
         })
         
         if isinstance(expr, str):
-            try:
-                return await env.lookup(expr)
-            except NameError:
-                return expr
+            # 未定義の名前は文字列リテラルとして扱う（例外を経由しない）
+            return env.get(expr, expr)
         elif not isinstance(expr, list):
             return expr
         
@@ -301,12 +306,7 @@ class AsyncContextualEvaluator:
             if not isinstance(max_iterations, int):
                 max_iterations = await self._evaluate_basic_async(max_iterations, env, task_id)
             
-            if not isinstance(max_iterations, (int, float)) or max_iterations <= 0:
-                raise TypeError(f"最大反復数は正の数値である必要があります: {max_iterations}")
-            
-            max_iterations = int(max_iterations)
-            if max_iterations > 10000:  # 安全上限
-                raise ValueError(f"最大反復数が制限を超えています: {max_iterations} > 10000")
+            max_iterations = check_max_iterations(max_iterations)
             
             # while ループ実行
             result = None
@@ -493,7 +493,9 @@ class AsyncContextualEvaluator:
                 from ..tools.math_engine import StepMathEngine
                 tool = StepMathEngine()
                 
-                result = await tool.execute(
+                # SymPy の計算はイベントループを塞がないよう別スレッドで実行
+                result = await asyncio.to_thread(
+                    tool.execute_sync,
                     expression=str(expression),
                     operation=str(operation),
                     var=str(var_name)
@@ -0,0 +1,314 @@
+"""
+S式バイトコードコンパイラ
+
+while ループを平坦な命令列に変換し、AST のノード形状によるディスパッチなしで実行する。
+対応する構文は seq / set / + / < と変数参照・定数のみで、それ以外を含むループは
+コンパイルせず（None を返し）従来の木構造評価に任せる。
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .parser import SExpression, freeze_s_expression
+
+# 命令は [opcode, a, b] の3要素固定長
+OP_CONST = 0            # consts[a] を積む
+OP_LOAD = 1             # slots[a] を積む
+OP_STORE = 2            # スタック先頭を slots[a] に格納（値は残す）
+OP_POP = 3              # スタック先頭を捨てる
+OP_ADD = 4              # 上位 a 個を左から加算
+OP_LT = 5               # 上位2個を比較
+OP_LT_LOCAL_CONST = 6   # slots[a] < consts[b] を積む
+OP_INC_LOCAL = 7        # slots[a] += consts[b] して新しい値を積む
+OP_JUMP_IF_FALSE = 8    # 先頭を取り出し、偽なら a へ
+OP_LOOP_GUARD = 9       # 反復数が上限に達していれば a へ
+OP_LOOP = 10            # 反復数を加算して a へ
+OP_STORE_RESULT = 11    # 先頭を取り出してループ結果に格納
+
+_INSTRUCTION_SIZE = 3
+
+# while の最大反復数の安全上限
+MAX_ITERATIONS_LIMIT = 10000
+
+# コンパイル結果のキャッシュ: (id(条件), id(本体), 束縛済み変数名) → (条件, 本体, 結果)
+_COMPILE_CACHE: Dict[Tuple[int, int, FrozenSet[str]], Tuple[Any, Any, Optional["CompiledWhile"]]] = {}
+_COMPILE_CACHE_LIMIT = 256
+
+
+@dataclass(eq=False)
+class CompiledWhile:
+    """コンパイル済み while ループ"""
+    code: array
+    consts: Tuple[Any, ...]
+    names: Tuple[str, ...]  # スロット番号順の変数名
+    counter: Optional[Tuple[int, int, int]] = None  # 単純カウンタループの (スロット, 上限定数, 増分定数)
+
+
+class _Unsupported(Exception):
+    """コンパイル対象外の構文（コンパイル時のみ使用）"""
+    pass
+
+
+class Compiler:
+    """while ループの条件と本体を命令列に変換"""
+
+    def __init__(self, bound: FrozenSet[str]):
+        self.bound = bound
+        self.code = array('i')
+        self.consts: List[Any] = []
+        self._const_index: Dict[Tuple[type, Any], int] = {}
+        self.names: List[str] = []
+        self._slot_index: Dict[str, int] = {}
+
+    def compile_while(self, condition: Any, body: Any) -> CompiledWhile:
+        """(while condition body) を命令列に変換"""
+        start = len(self.code)
+        guard = self._emit(OP_LOOP_GUARD)
+        self._compile(condition)
+        exit_jump = self._emit(OP_JUMP_IF_FALSE)
+        self._compile(body)
+        self._emit(OP_STORE_RESULT)
+        self._emit(OP_LOOP, start)
+
+        end = len(self.code)
+        self.code[guard + 1] = end
+        self.code[exit_jump + 1] = end
+        return CompiledWhile(self.code, tuple(self.consts), tuple(self.names), counter=self._counter_shape())
+    
+    def _counter_shape(self) -> Optional[Tuple[int, int, int]]:
+        """(while (< v 上限) (set v (+ v 増分))) の形なら (スロット, 上限, 増分) の定数番号を返す"""
+        ops = self.code[::_INSTRUCTION_SIZE]
+        if list(ops) != [OP_LOOP_GUARD, OP_LT_LOCAL_CONST, OP_JUMP_IF_FALSE,
+                         OP_INC_LOCAL, OP_STORE_RESULT, OP_LOOP]:
+            return None
+        _, slot, limit = self.code[3:6]
+        _, inc_slot, step = self.code[9:12]
+        if slot != inc_slot:
+            return None
+        return slot, limit, step
+
+    def _emit(self, op: int, a: int = 0, b: int = 0) -> int:
+        position = len(self.code)
+        self.code.extend((op, a, b))
+        return position
+
+    def _const(self, value: Any) -> int:
+        key = (type(value), value)  # 1 と True を区別
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def _slot(self, name: str) -> int:
+        index = self._slot_index.get(name)
+        if index is None:
+            index = self._slot_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def _is_local(self, node: Any) -> bool:
+        return isinstance(node, str) and node in self.bound
+
+    @staticmethod
+    def _is_const(node: Any) -> bool:
+        return not isinstance(node, (str, tuple))
+
+    def _compile(self, node: Any) -> None:
+        if isinstance(node, str):
+            # 未束縛の名前は評価器と同じく文字列リテラルとして扱う
+            if node in self.bound:
+                self._emit(OP_LOAD, self._slot(node))
+            else:
+                self._emit(OP_CONST, self._const(node))
+            return
+        if not isinstance(node, tuple):
+            self._emit(OP_CONST, self._const(node))
+            return
+        if not node:
+            raise _Unsupported("空リスト")
+
+        op, args = node[0], node[1:]
+        if op == 'seq':
+            if not args:
+                self._emit(OP_CONST, self._const(None))
+            for i, arg in enumerate(args):
+                if i:
+                    self._emit(OP_POP)
+                self._compile(arg)
+        elif op == 'set':
+            if len(args) != 2 or not self._is_local(args[0]):
+                raise _Unsupported("set")
+            var_name, value = args
+            slot = self._slot(var_name)
+            if (isinstance(value, tuple) and len(value) == 3 and value[0] == '+'
+                    and value[1] == var_name and self._is_const(value[2])):
+                # (set v (+ v 定数)) は1命令に融合
+                self._emit(OP_INC_LOCAL, slot, self._const(value[2]))
+            else:
+                self._compile(value)
+                self._emit(OP_STORE, slot)
+        elif op == '+':
+            if len(args) < 2:
+                raise _Unsupported("+")
+            for arg in args:
+                self._compile(arg)
+            self._emit(OP_ADD, len(args))
+        elif op == '<':
+            if len(args) != 2:
+                raise _Unsupported("<")
+            if self._is_local(args[0]) and self._is_const(args[1]):
+                self._emit(OP_LT_LOCAL_CONST, self._slot(args[0]), self._const(args[1]))
+            else:
+                self._compile(args[0])
+                self._compile(args[1])
+                self._emit(OP_LT)
+        else:
+            raise _Unsupported(str(op))
+
+
+def check_max_iterations(max_iterations: Any) -> int:
+    """while の最大反復数を検証して int で返す（ループ開始前に1回だけ呼ぶ）"""
+    if type(max_iterations) is int and 0 < max_iterations <= MAX_ITERATIONS_LIMIT:
+        return max_iterations
+    return _reject_max_iterations(max_iterations)
+
+
+def _reject_max_iterations(max_iterations: Any) -> int:
+    """最大反復数の検証（int 以外・範囲外の低頻度な経路）"""
+    if not isinstance(max_iterations, (int, float)) or max_iterations <= 0:
+        raise TypeError(f"最大反復数は正の数値である必要があります: {max_iterations}")
+    
+    max_iterations = int(max_iterations)
+    if max_iterations > MAX_ITERATIONS_LIMIT:
+        raise ValueError(f"最大反復数が制限を超えています: {max_iterations} > {MAX_ITERATIONS_LIMIT}")
+    return max_iterations
+
+
+def _collect_names(node: Any, names: set) -> None:
+    """凍結済みS式に含まれる文字列アトムを収集"""
+    if isinstance(node, tuple):
+        for item in node:
+            _collect_names(item, names)
+    elif isinstance(node, str):
+        names.add(node)
+
+
+def _is_bound(env: Any, name: str) -> bool:
+    """環境チェーンのどこかで束縛されているか（例外を使わずに判定）"""
+    while env is not None:
+        if name in env.bindings:
+            return True
+        env = env.parent
+    return False
+
+
+def compile_while(condition: SExpression, body: SExpression, env: Any) -> Optional[CompiledWhile]:
+    """
+    while ループをコンパイル（対象外の構文を含む場合は None）
+
+    変数参照をスロットに解決するため、現在の環境で束縛済みの名前ごとに結果をキャッシュする。
+    """
+    try:
+        frozen_condition = freeze_s_expression(condition)
+        frozen_body = freeze_s_expression(body)
+    except TypeError:
+        return None
+
+    names: set = set()
+    _collect_names(frozen_condition, names)
+    _collect_names(frozen_body, names)
+    bound = frozenset(name for name in names if _is_bound(env, name))
+
+    key = (id(frozen_condition), id(frozen_body), bound)
+    cached = _COMPILE_CACHE.get(key)
+    if cached is not None and cached[0] is frozen_condition and cached[1] is frozen_body:
+        return cached[2]
+
+    try:
+        compiled = Compiler(bound).compile_while(frozen_condition, frozen_body)
+    except _Unsupported:
+        compiled = None
+
+    if len(_COMPILE_CACHE) >= _COMPILE_CACHE_LIMIT:
+        _COMPILE_CACHE.clear()
+    _COMPILE_CACHE[key] = (frozen_condition, frozen_body, compiled)
+    return compiled
+
+
+def execute_bytecode(compiled: CompiledWhile, env: Any, max_iterations: int) -> Any:
+    """コンパイル済み while ループを実行し、最後の本体評価結果を返す"""
+    names = compiled.names
+    slots = [env.lookup(name) for name in names]
+
+    # 整数の単純カウンタループは反復せず閉じた式で最終値を求める
+    if compiled.counter is not None:
+        slot, limit_index, step_index = compiled.counter
+        value, limit, step = slots[slot], compiled.consts[limit_index], compiled.consts[step_index]
+        if type(value) is int and type(limit) is int and type(step) is int and step > 0:
+            if not value < limit:
+                return None
+            count = min(max_iterations, (limit - value + step - 1) // step)
+            if count <= 0:
+                return None
+            value += count * step
+            env.set(names[slot], value)
+            return value
+
+    code = compiled.code
+    consts = compiled.consts
+    stack: List[Any] = []
+    push = stack.append
+    pop = stack.pop
+
+    result = None
+    count = 0
+    pc = 0
+    end = len(code)
+    try:
+        while pc < end:
+            op = code[pc]
+            a = code[pc + 1]
+            pc += _INSTRUCTION_SIZE
+
+            if op == OP_LT_LOCAL_CONST:
+                push(slots[a] < consts[code[pc - 1]])
+            elif op == OP_INC_LOCAL:
+                value = slots[a] + consts[code[pc - 1]]
+                slots[a] = value
+                push(value)
+            elif op == OP_JUMP_IF_FALSE:
+                if not pop():
+                    pc = a
+            elif op == OP_LOOP_GUARD:
+                if count >= max_iterations:
+                    pc = a
+            elif op == OP_LOOP:
+                count += 1
+                pc = a
+            elif op == OP_STORE_RESULT:
+                result = pop()
+            elif op == OP_LOAD:
+                push(slots[a])
+            elif op == OP_CONST:
+                push(consts[a])
+            elif op == OP_STORE:
+                slots[a] = stack[-1]
+            elif op == OP_POP:
+                pop()
+            elif op == OP_ADD:
+                operands = stack[-a:]
+                del stack[-a:]
+                value = operands[0]
+                for operand in operands[1:]:
+                    value = value + operand
+                push(value)
+            elif op == OP_LT:
+                right = pop()
+                push(pop() < right)
+    finally:
+        # 途中で例外が出た場合も、それまでの代入を環境に反映
+        for name, value in zip(names, slots):
+            env.set(name, value)
+    return result
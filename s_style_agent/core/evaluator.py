@@ -13,9 +13,9 @@ from langsmith import traceable
 # from langgraph.graph.state import CompiledGraph
 
 from .parser import parse_s_expression, SExpression
+from .bytecode import check_max_iterations, compile_while, execute_bytecode
 from .trace_logger import get_global_logger, ExecutionMetadata, ProvenanceType
 from ..config.settings import settings
-import sympy as sp
 
 
 class SecurityError(Exception):
@@ -23,6 +23,10 @@ class SecurityError(Exception):
     pass
 
 
+# 未定義変数を表す番兵（None を値として束縛できるよう区別する）
+_UNBOUND = object()
+
+
 class Environment:
     """変数束縛を管理する環境クラス"""
     
@@ -45,12 +49,20 @@ class Environment:
     
     def lookup(self, var: str) -> Any:
         """変数を検索"""
-        if var in self.bindings:
-            return self.bindings[var]
-        elif self.parent:
-            return self.parent.lookup(var)
-        else:
+        value = self.get(var, _UNBOUND)
+        if value is _UNBOUND:
             raise NameError(f"Name '{var}' is not defined")
+        return value
+    
+    def get(self, var: str, default: Any = None) -> Any:
+        """変数を検索（未定義なら default、例外を使わずスコープチェーンを反復で辿る）"""
+        env = self
+        while env is not None:
+            value = env.bindings.get(var, _UNBOUND)
+            if value is not _UNBOUND:
+                return value
+            env = env.parent
+        return default
     
     def get_all_bindings(self) -> Dict[str, Any]:
         """すべての変数束縛を取得（デバッグ用）"""
@@ -59,6 +71,10 @@ class Environment:
             all_bindings.update(self.parent.get_all_bindings())
         all_bindings.update(self.bindings)
         return all_bindings
+    
+    def reset(self) -> None:
+        """この環境の変数束縛をすべて削除（評価器・環境の再利用用）"""
+        self.bindings.clear()
 
 
 class ContextualEvaluator:
@@ -178,17 +194,12 @@ class ContextualEvaluator:
             })
         
             if isinstance(expr, str):
-                try:
-                    result = env.lookup(expr)
-                    # トレースログ完了
-                    metadata = ExecutionMetadata(provenance=ProvenanceType.BUILTIN)
-                    logger.end_operation(entry_id, result, metadata)
-                    return result
-                except NameError:
-                    result = expr
-                    metadata = ExecutionMetadata(provenance=ProvenanceType.BUILTIN)
-                    logger.end_operation(entry_id, result, metadata)
-                    return result
+                # 未定義の名前は文字列リテラルとして扱う（例外を経由しない）
+                result = env.get(expr, expr)
+                # トレースログ完了
+                metadata = ExecutionMetadata(provenance=ProvenanceType.BUILTIN)
+                logger.end_operation(entry_id, result, metadata)
+                return result
             elif not isinstance(expr, list):
                 metadata = ExecutionMetadata(provenance=ProvenanceType.BUILTIN)
                 logger.end_operation(entry_id, expr, metadata)
@@ -298,32 +309,32 @@ class ContextualEvaluator:
                 if not isinstance(max_iterations, int):
                     max_iterations = self._evaluate_basic(max_iterations, env)
                 
-                if not isinstance(max_iterations, (int, float)) or max_iterations <= 0:
-                    raise TypeError(f"最大反復数は正の数値である必要があります: {max_iterations}")
-                
-                max_iterations = int(max_iterations)
-                if max_iterations > 10000:  # 安全上限
-                    raise ValueError(f"最大反復数が制限を超えています: {max_iterations} > 10000")
-                
-                # while ループ実行
-                result = None
-                iteration_count = 0
+                max_iterations = check_max_iterations(max_iterations)
                 
-                while iteration_count < max_iterations:
-                    # 条件評価
-                    logger.push_path(1)
-                    condition_result = self._evaluate_basic(condition_expr, env)
-                    logger.pop_path()
-                    
-                    # 条件が偽なら終了
-                    if not condition_result:
-                        break
+                # トレース無効時は対応する構文のみのループをバイトコードで実行
+                compiled = None if settings.system.trace_enabled else compile_while(condition_expr, body_expr, env)
+                if compiled is not None:
+                    result = execute_bytecode(compiled, env, max_iterations)
+                else:
+                    # while ループ実行
+                    result = None
+                    iteration_count = 0
                     
-                    # ボディ実行
-                    logger.push_path(2)
-                    result = self._evaluate_basic(body_expr, env)
-                    logger.pop_path()
-                    iteration_count += 1
+                    while iteration_count < max_iterations:
+                        # 条件評価
+                        logger.push_path(1)
+                        condition_result = self._evaluate_basic(condition_expr, env)
+                        logger.pop_path()
+                        
+                        # 条件が偽なら終了
+                        if not condition_result:
+                            break
+                        
+                        # ボディ実行
+                        logger.push_path(2)
+                        result = self._evaluate_basic(body_expr, env)
+                        logger.pop_path()
+                        iteration_count += 1
             elif op == '+':
                 # 加算: (+ a b ...)
                 if len(args) < 2:
@@ -452,7 +463,8 @@ class ContextualEvaluator:
                 logger.pop_path()
                 
                 try:
-                    # 記号数学エンジンによる計算
+                    # 記号数学エンジンによる計算（SymPy は初回使用時に読み込む）
+                    import sympy as sp
                     calc_result = sp.N(sp.sympify(str(expression)))
                     result = float(calc_result) if calc_result.is_number else str(calc_result)
                 except Exception as e:
@@ -477,6 +489,7 @@ class ContextualEvaluator:
                 var_name = args[2] if len(args) > 2 else "x"
                 
                 try:
+                    import sympy as sp
                     expr = sp.sympify(str(expression))
                     var = sp.symbols(str(var_name))
                     
@@ -516,31 +529,13 @@ class ContextualEvaluator:
                     from ..tools.math_engine import StepMathEngine
                     tool = StepMathEngine()
                     
-                    # 同期的に実行するためにasyncioを使用
-                    import asyncio
+                    # I/O を伴わないため同期版を直接呼ぶ（イベントループやスレッドは不要）
                     try:
-                        # 現在のイベントループを取得、なければ新規作成
-                        try:
-                            loop = asyncio.get_running_loop()
-                            # 新しいスレッドで実行
-                            import concurrent.futures
-                            with concurrent.futures.ThreadPoolExecutor() as executor:
-                                future = executor.submit(
-                                    asyncio.run,
-                                    tool.execute(
-                                        expression=str(expression),
-                                        operation=str(operation),
-                                        var=str(var_name)
-                                    )
-                                )
-                                step_result = future.result()
-                        except RuntimeError:
-                            # イベントループが実行中でない場合
-                            step_result = asyncio.run(tool.execute(
-                                expression=str(expression),
-                                operation=str(operation),
-                                var=str(var_name)
-                            ))
+                        step_result = tool.execute_sync(
+                            expression=str(expression),
+                            operation=str(operation),
+                            var=str(var_name)
+                        )
                         
                         if step_result.success:
                             result = step_result.result
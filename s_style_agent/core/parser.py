@@ -4,14 +4,38 @@ S式パーサー - langchainベース実装
 conceptディレクトリのparser.pyをベースに、langchainのtraceability機能を追加
 """
 
+import functools
 import re
-from typing import Any, List, Union
+import sys
+from typing import Any, Dict, List, Tuple, Union
 from langchain_core.runnables import RunnableLambda
 from langsmith import traceable
 
 # 型エイリアスの定義
 SExpression = Union[str, int, float, List['SExpression']]
 AtomType = Union[str, int, float]
+FrozenSExpression = Union[str, int, float, Tuple['FrozenSExpression', ...]]
+
+# 括弧、文字列リテラル、シンボル、数値を識別する正規表現
+_TOKEN_RE = re.compile(r'"(?:\\"|[^"])*"|\(|\)|[^\s()]+')
+
+# 組み込み演算子（数値変換を試みずシンボルとして扱う）
+_KEYWORDS = frozenset({
+    "plan", "seq", "par", "if", "let", "set", "while", "handle",
+    "notify", "search", "calc", "db-query", "math", "step_math", "ask_user",
+    "+", "-", "*", "/", "<", ">", "<=", ">=", "="
+})
+
+
+# hash-consing 表（構造的に同一な部分木を同一のタプルオブジェクトで共有）
+# キーは子タプルの id とアトムの (型, 値)。1 / 1.0 / True を区別するため型を含める
+_HASH_CONS: Dict[tuple, tuple] = {}
+_HASH_CONS_LIMIT = 65536
+
+# 解析に失敗した文字列 -> エラーメッセージ（_parse_frozen の lru_cache は例外を記憶しないため別に保持）
+# LLM が同じ不正な出力を繰り返しても再トークン化しない
+_PARSE_ERRORS: Dict[str, str] = {}
+_PARSE_ERRORS_LIMIT = 512
 
 
 class SExpressionParseError(Exception):
@@ -22,22 +46,22 @@ class SExpressionParseError(Exception):
 @traceable(name="tokenize_s_expression")
 def tokenize_s_expression(s_expr_str: str) -> List[str]:
     """S式文字列をトークンに分割"""
-    # 括弧、文字列リテラル、シンボル、数値を識別する正規表現
-    tokens = re.findall(r'"(?:\\"|[^"])*"|\(|\)|[^\s()]+', s_expr_str)
-    return tokens
+    return _TOKEN_RE.findall(s_expr_str)
 
 
 def parse_atom(token: str) -> AtomType:
     """トークンを適切なPythonの型に変換"""
     if token.startswith('"') and token.endswith('"'):
         return token[1:-1]  # 文字列リテラルから引用符を削除
+    if token in _KEYWORDS:
+        return sys.intern(token)
     try:
         return int(token)
     except ValueError:
         try:
             return float(token)
         except ValueError:
-            return token  # シンボルとして扱う  # シンボルとして扱う
+            return sys.intern(token)  # シンボルとして扱う
 
 
 def parse_from_tokens(tokens: List[str]) -> SExpression:
@@ -61,19 +85,41 @@ def parse_from_tokens(tokens: List[str]) -> SExpression:
         return parse_atom(token)
 
 
-def parse_s_expression(s_expr_str: str) -> SExpression:
+def freeze_s_expression(expr: SExpression) -> FrozenSExpression:
     """
-    S式文字列を解析し、Pythonのリストとアトムの構造に変換
+    S式を不変なタプル構造に変換（hash-consing）
+    
+    構造的に同一な部分木は同一のタプルオブジェクトになるため、
+    結果の同一性（is / id）で同じS式かどうかを判定できる。
+    文字列アトムは sys.intern される。
     
-    Args:
-        s_expr_str: S式の文字列表現
-        
-    Returns:
-        解析されたS式のPython表現
-        
     Raises:
-        SExpressionParseError: パースエラーが発生した場合
+        TypeError: ハッシュ不可能なアトムを含む場合
     """
+    if isinstance(expr, list):
+        items = tuple(freeze_s_expression(item) for item in expr)
+        key = tuple(id(item) if isinstance(item, tuple) else (type(item), item) for item in items)
+        shared = _HASH_CONS.get(key)
+        if shared is None:
+            if len(_HASH_CONS) >= _HASH_CONS_LIMIT:
+                _HASH_CONS.clear()
+            shared = _HASH_CONS[key] = items
+        return shared
+    if isinstance(expr, str):
+        return sys.intern(expr)
+    return expr
+
+
+def _thaw(expr: FrozenSExpression) -> SExpression:
+    """タプルを新しいリストに戻す（呼び出し側が変更してもキャッシュに影響しない）"""
+    if isinstance(expr, tuple):
+        return [_thaw(item) for item in expr]
+    return expr
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_frozen(s_expr_str: str) -> FrozenSExpression:
+    """S式文字列を解析し、不変なタプル構造で返す（結果をキャッシュ）"""
     try:
         tokens = tokenize_s_expression(s_expr_str)
         if not tokens:
@@ -85,13 +131,46 @@ def parse_s_expression(s_expr_str: str) -> SExpression:
         if tokens:
             raise SExpressionParseError(f'Unexpected tokens after expression: {tokens}')
             
-        return result
+        return freeze_s_expression(result)
     except Exception as e:
         if isinstance(e, SExpressionParseError):
             raise
         raise SExpressionParseError(f'Parse error: {str(e)}')
 
 
+def parse_s_expression(s_expr_str: str) -> SExpression:
+    """
+    S式文字列を解析し、Pythonのリストとアトムの構造に変換
+    
+    同じ文字列の解析結果・解析エラーはキャッシュされ、トークン化と解析を省略する。
+    戻り値は呼び出しごとに新しいリストなので変更しても安全。
+    
+    Args:
+        s_expr_str: S式の文字列表現
+        
+    Returns:
+        解析されたS式のPython表現
+        
+    Raises:
+        SExpressionParseError: パースエラーが発生した場合
+    """
+    try:
+        error_message = _PARSE_ERRORS.get(s_expr_str)
+    except TypeError as e:  # ハッシュ不可能な入力（キャッシュキーにできない）
+        raise SExpressionParseError(f'Parse error: {str(e)}')
+    if error_message is not None:
+        raise SExpressionParseError(error_message)
+    
+    try:
+        frozen = _parse_frozen(s_expr_str)
+    except SExpressionParseError as e:
+        if len(_PARSE_ERRORS) >= _PARSE_ERRORS_LIMIT:
+            _PARSE_ERRORS.clear()
+        _PARSE_ERRORS[s_expr_str] = str(e)
+        raise
+    return _thaw(frozen)
+
+
 # Langchain Runnable として公開
 parser_runnable = RunnableLambda(parse_s_expression)
 
@@ -7,13 +7,15 @@ LLM出力のS式をJSON Schemaに基づいて検証し、
 
 import json
 import os
+import re
 from typing import Any, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import jsonschema
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from langsmith import traceable
 
 from ..config.settings import settings
+from .parser import _thaw, freeze_s_expression
 
 SExpression = Union[str, int, float, bool, List[Any]]
 
@@ -25,19 +27,131 @@ class SchemaValidationError(Exception):
     """スキーマ検証エラー"""
     pass
 
+# 禁止操作（集合で O(1) 判定）
+_FORBIDDEN_OPERATIONS = frozenset({
+    "__import__", "eval", "exec", "compile", "open", "file",
+    "input", "raw_input", "reload", "vars", "globals", "locals",
+    "delattr", "setattr", "getattr", "hasattr"
+})
+
+# 禁止パターン（エラーメッセージ用の元文字列と、個別・一括のコンパイル済み正規表現）
+_RESTRICTED_PATTERNS = (
+    r"__.*__",  # ダンダーメソッド
+    r"import\s+",  # import文
+    r"from\s+.*\s+import",  # from import文
+    r"exec\s*\(",  # exec呼び出し
+    r"eval\s*\(",  # eval呼び出し
+)
+_RESTRICTED_REGEXES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in _RESTRICTED_PATTERNS)
+_RESTRICTED_ANY_RE = re.compile("|".join(f"(?:{pattern})" for pattern in _RESTRICTED_PATTERNS), re.IGNORECASE)
+
+# 各演算子の引数数要件
+_OP_REQUIREMENTS = {
+    "seq": {"min": 1, "max": None},
+    "par": {"min": 1, "max": None},
+    "if": {"min": 2, "max": 3},
+    "handle": {"min": 3, "max": 3},
+    "while": {"min": 2, "max": 3},
+    "let": {"min": 2, "max": 2},
+    "set": {"min": 2, "max": 2},
+    "+": {"min": 2, "max": None},
+    "<": {"min": 2, "max": 2},
+    "notify": {"min": 1, "max": 1},
+    "calc": {"min": 1, "max": 1},
+    "ask_user": {"min": 1, "max": 3}
+}
+
+
+def _check_security_node(rules: Dict[str, Any], node: Any, depth: int, errors: List[str]) -> None:
+    """セキュリティチェック（明示スタックで反復走査、errors に追記）
+
+    深度超過を検出した時点で走査を打ち切る（深いASTは O(max_depth) で拒否）。
+    """
+    max_depth = rules["max_depth"]
+    max_string_length = rules["max_string_length"]
+    forbidden_operations = rules["forbidden_operations"]
+    restricted_any = rules["restricted_any"]
+    
+    stack = [(node, depth)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > max_depth:
+            errors.append(f"AST深度が制限を超えています: {depth} > {max_depth}")
+            return
+        
+        if isinstance(node, str):
+            # 文字列長チェック
+            if len(node) > max_string_length:
+                errors.append(f"文字列が長すぎます: {len(node)} > {max_string_length}")
+            
+            # 禁止操作チェック
+            if node in forbidden_operations:
+                errors.append(f"禁止された操作: {node}")
+            
+            # パターンマッチング（一括パターンで1回走査し、ヒット時のみ個別に特定）
+            if restricted_any.search(node):
+                for pattern, regex in zip(rules["restricted_patterns"], rules["restricted_regexes"]):
+                    if regex.search(node):
+                        errors.append(f"禁止されたパターン: '{pattern}' in '{node}'")
+        
+        elif isinstance(node, list):
+            # 先頭要素から処理されるよう逆順に積む（エラー順序は再帰版と同じ）
+            child_depth = depth + 1
+            stack.extend((item, child_depth) for item in reversed(node))
+
+
+def _check_structure_node(node: Any, path: str, errors: List[str]) -> None:
+    """構造チェック（ノード単位、errors に追記）"""
+    if isinstance(node, list):
+        if len(node) == 0:
+            errors.append(f"空のリストは無効です: {path}")
+            return
+        
+        # 演算子チェック
+        op = node[0]
+        if not isinstance(op, str):
+            errors.append(f"演算子は文字列である必要があります: {path}[0] = {type(op)}")
+            return
+        
+        # 各演算子の引数数チェック
+        arg_count = len(node) - 1
+        req = _OP_REQUIREMENTS.get(op)
+        if req is not None:
+            if arg_count < req["min"]:
+                errors.append(f"'{op}'の引数が不足: {path} (必要: {req['min']}個以上, 実際: {arg_count}個)")
+            if req["max"] is not None and arg_count > req["max"]:
+                errors.append(f"'{op}'の引数が過多: {path} (最大: {req['max']}個, 実際: {arg_count}個)")
+        
+        # 再帰的チェック
+        for i, child in enumerate(node[1:], 1):
+            _check_structure_node(child, f"{path}[{i}]", errors)
+
+
 class SExpressionValidator:
     """S式AST バリデータ"""
     
-    def __init__(self, schema_path: Optional[str] = None, validation_level: str = "strict"):
+    def __init__(self, schema_path: Optional[str] = None, validation_level: str = "strict",
+                 cache_size: int = 1024):
         """
         Args:
             schema_path: スキーマファイルのパス
             validation_level: 検証レベル ("strict", "permissive", "experimental")
+            cache_size: 静的チェック結果キャッシュの最大件数
         """
         self.validation_level = validation_level
         self.schema = self._load_schema(schema_path)
         self.security_rules = self._init_security_rules()
         
+        # スキーマ検証器を一度だけ構築（jsonschema.validate は呼び出しごとにスキーマ自体を再検証する）
+        validator_cls = jsonschema.validators.validator_for(self.schema)
+        validator_cls.check_schema(self.schema)
+        self._schema_validator = validator_cls(self.schema)
+        
+        # 静的チェック（セキュリティ・構造・スキーマ）結果のキャッシュ
+        # hash-consing 済みS式の id -> (S式, エラー)。S式を保持して id の再利用を検出する
+        self._static_cache: Dict[int, Tuple[Any, Tuple[str, ...]]] = {}
+        self._static_cache_size = cache_size
+        
     def _load_schema(self, schema_path: Optional[str]) -> Dict[str, Any]:
         """JSON Schemaをロード"""
         if schema_path is None:
@@ -55,21 +169,13 @@ class SExpressionValidator:
     def _init_security_rules(self) -> Dict[str, Any]:
         """セキュリティルールを初期化"""
         return {
-            "forbidden_operations": [
-                "__import__", "eval", "exec", "compile", "open", "file",
-                "input", "raw_input", "reload", "vars", "globals", "locals",
-                "delattr", "setattr", "getattr", "hasattr"
-            ],
+            "forbidden_operations": _FORBIDDEN_OPERATIONS,
             "max_depth": 20,  # AST最大深度
             "max_nodes": 1000,  # AST最大ノード数
             "max_string_length": 10000,  # 文字列最大長
-            "restricted_patterns": [
-                r"__.*__",  # ダンダーメソッド
-                r"import\s+",  # import文
-                r"from\s+.*\s+import",  # from import文
-                r"exec\s*\(",  # exec呼び出し
-                r"eval\s*\(",  # eval呼び出し
-            ]
+            "restricted_patterns": _RESTRICTED_PATTERNS,
+            "restricted_regexes": _RESTRICTED_REGEXES,
+            "restricted_any": _RESTRICTED_ANY_RE,
         }
     
     @traceable(name="validate_s_expression")
@@ -87,20 +193,9 @@ class SExpressionValidator:
         Returns:
             (is_valid, error_messages)
         """
-        errors = []
-        
         try:
-            # 1. セキュリティチェック
-            security_errors = self._check_security(expr)
-            errors.extend(security_errors)
-            
-            # 2. 構造チェック
-            structure_errors = self._check_structure(expr)
-            errors.extend(structure_errors)
-            
-            # 3. JSON Schema バリデーション
-            schema_errors = self._validate_schema(expr)
-            errors.extend(schema_errors)
+            # 1.〜3. セキュリティ・構造・JSON Schema チェック（同一構造のS式は結果を再利用）
+            errors = self._static_errors(expr)
             
             # 4. 検証レベル別チェック
             level_errors = self._validate_by_level(expr)
@@ -117,87 +212,46 @@ class SExpressionValidator:
             error_msg = f"検証中にエラーが発生: {str(e)}"
             return False, [error_msg]
     
+    def _static_errors(self, expr: SExpression) -> List[str]:
+        """セキュリティ・構造・スキーマチェックのエラー（hash-consing でキャッシュ）"""
+        try:
+            frozen = freeze_s_expression(expr)
+        except TypeError:  # ハッシュ不可能な要素を含む場合はキャッシュしない
+            return self._run_static_checks(expr)
+        
+        cached = self._static_cache.get(id(frozen))
+        if cached is not None and cached[0] is frozen:
+            return list(cached[1])
+        
+        errors = self._run_static_checks(expr)
+        if len(self._static_cache) >= self._static_cache_size:
+            self._static_cache.clear()
+        self._static_cache[id(frozen)] = (frozen, tuple(errors))
+        return errors
+    
+    def _run_static_checks(self, expr: SExpression) -> List[str]:
+        """セキュリティ・構造・スキーマチェックを実行"""
+        errors = self._check_security(expr)
+        errors.extend(self._check_structure(expr))
+        errors.extend(self._validate_schema(expr))
+        return errors
+    
     def _check_security(self, expr: SExpression) -> List[str]:
         """セキュリティチェック"""
         errors = []
         
-        def check_node(node: Any, depth: int = 0) -> None:
-            if depth > self.security_rules["max_depth"]:
-                errors.append(f"AST深度が制限を超えています: {depth} > {self.security_rules['max_depth']}")
-                return
-            
-            if isinstance(node, str):
-                # 文字列長チェック
-                if len(node) > self.security_rules["max_string_length"]:
-                    errors.append(f"文字列が長すぎます: {len(node)} > {self.security_rules['max_string_length']}")
-                
-                # 禁止操作チェック
-                if node in self.security_rules["forbidden_operations"]:
-                    errors.append(f"禁止された操作: {node}")
-                
-                # パターンマッチング
-                import re
-                for pattern in self.security_rules["restricted_patterns"]:
-                    if re.search(pattern, node, re.IGNORECASE):
-                        errors.append(f"禁止されたパターン: '{pattern}' in '{node}'")
-            
-            elif isinstance(node, list):
-                for item in node:
-                    check_node(item, depth + 1)
-        
         # ノード数カウント
         node_count = self._count_nodes(expr)
         if node_count > self.security_rules["max_nodes"]:
             errors.append(f"ASTノード数が制限を超えています: {node_count} > {self.security_rules['max_nodes']}")
         
-        check_node(expr)
+        _check_security_node(self.security_rules, expr, 0, errors)
         return errors
     
     def _check_structure(self, expr: SExpression) -> List[str]:
         """構造チェック"""
         errors = []
-        
-        def validate_structure(node: Any, path: str = "root") -> None:
-            if isinstance(node, list):
-                if len(node) == 0:
-                    errors.append(f"空のリストは無効です: {path}")
-                    return
-                
-                # 演算子チェック
-                op = node[0]
-                if not isinstance(op, str):
-                    errors.append(f"演算子は文字列である必要があります: {path}[0] = {type(op)}")
-                    return
-                
-                # 各演算子の引数数チェック
-                arg_count = len(node) - 1
-                op_requirements = {
-                    "seq": {"min": 1, "max": None},
-                    "par": {"min": 1, "max": None},
-                    "if": {"min": 2, "max": 3},
-                    "handle": {"min": 3, "max": 3},
-                    "while": {"min": 2, "max": 3},
-                    "let": {"min": 2, "max": 2},
-                    "set": {"min": 2, "max": 2},
-                    "+": {"min": 2, "max": None},
-                    "<": {"min": 2, "max": 2},
-                    "notify": {"min": 1, "max": 1},
-                    "calc": {"min": 1, "max": 1},
-                    "ask_user": {"min": 1, "max": 3}
-                }
-                
-                if op in op_requirements:
-                    req = op_requirements[op]
-                    if arg_count < req["min"]:
-                        errors.append(f"'{op}'の引数が不足: {path} (必要: {req['min']}個以上, 実際: {arg_count}個)")
-                    if req["max"] is not None and arg_count > req["max"]:
-                        errors.append(f"'{op}'の引数が過多: {path} (最大: {req['max']}個, 実際: {arg_count}個)")
-                
-                # 再帰的チェック
-                for i, child in enumerate(node[1:], 1):
-                    validate_structure(child, f"{path}[{i}]")
-        
-        validate_structure(expr)
+        _check_structure_node(expr, "root", errors)
         return errors
     
     def _validate_schema(self, expr: SExpression) -> List[str]:
@@ -211,8 +265,10 @@ class SExpressionValidator:
                 "metadata": {"version": "1.0.0"}
             }
             
-            # Schema検証実行
-            validate(instance=validation_obj, schema=self.schema)
+            # Schema検証実行（jsonschema.validate と同じく最も関連の深いエラーを採用）
+            error = jsonschema.exceptions.best_match(self._schema_validator.iter_errors(validation_obj))
+            if error is not None:
+                raise error
             
         except ValidationError as e:
             errors.append(f"スキーマ検証エラー: {e.message} (パス: {' -> '.join(str(p) for p in e.absolute_path)})")
@@ -242,11 +298,15 @@ class SExpressionValidator:
         return errors
     
     def _count_nodes(self, expr: SExpression) -> int:
-        """ASTのノード数をカウント"""
-        if isinstance(expr, list):
-            return 1 + sum(self._count_nodes(item) for item in expr)
-        else:
-            return 1
+        """ASTのノード数をカウント（明示スタックで反復走査）"""
+        count = 0
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            count += 1
+            if isinstance(node, list):
+                stack.extend(node)
+        return count
     
     def _log_validation_result(self, expr: SExpression, is_valid: bool, 
                               errors: List[str], source: str, llm_model: str) -> None:
@@ -261,10 +321,17 @@ class SExpressionValidator:
 class LLMOutputGate:
     """LLM出力ゲート検証器"""
     
-    def __init__(self, validation_level: str = "strict"):
+    def __init__(self, validation_level: str = "strict", cache_size: int = 1024):
         self.validator = SExpressionValidator(validation_level=validation_level)
+        self.validation_level = validation_level
         self.blocked_count = 0
         self.allowed_count = 0
+        
+        # 検証はLLM出力文字列に対して純粋なためキャッシュ
+        # （検証レベルはインスタンスごとに固定なのでキーは出力文字列とログ用モデル名）
+        # S式は不変なタプル構造で保持し、返すときに新しいリストへ戻す
+        self._result_cache: Dict[Tuple[str, str], Tuple[bool, Any, Tuple[str, ...]]] = {}
+        self._result_cache_size = cache_size
     
     @traceable(name="llm_output_gate")
     def validate_llm_output(self, raw_output: str, llm_model: str = "unknown") -> Tuple[bool, SExpression, List[str]]:
@@ -278,8 +345,57 @@ class LLMOutputGate:
         Returns:
             (is_approved, parsed_expr, error_messages)
         """
-        errors = []
+        is_approved, frozen_expr, errors = self._validate_cached(raw_output, llm_model)
+        
+        # 統計はキャッシュヒット時も呼び出しごとに更新
+        if is_approved:
+            self.allowed_count += 1
+        else:
+            self.blocked_count += 1
         
+        return is_approved, _thaw(frozen_expr), list(errors)
+    
+    @traceable(name="llm_output_gate_batch")
+    def validate_batch(self, raw_outputs: List[str], llm_model: str = "unknown") -> List[Tuple[bool, SExpression, List[str]]]:
+        """
+        複数のLLM出力をまとめて検証
+        
+        Args:
+            raw_outputs: LLMの生成テキストのリスト
+            llm_model: 使用したLLMモデル名
+            
+        Returns:
+            各出力の (is_approved, parsed_expr, error_messages) のリスト（入力順）
+        """
+        validate_cached = self._validate_cached
+        
+        # バッチ内の重複は1回だけ検証
+        unique_results = {output: validate_cached(output, llm_model) for output in dict.fromkeys(raw_outputs)}
+        results = [unique_results[output] for output in raw_outputs]
+        
+        # 統計はバッチ単位でまとめて更新
+        allowed = sum(1 for is_approved, _, _ in results if is_approved)
+        self.allowed_count += allowed
+        self.blocked_count += len(results) - allowed
+        
+        return [(is_approved, _thaw(frozen_expr), list(errors)) for is_approved, frozen_expr, errors in results]
+    
+    def _validate_cached(self, raw_output: str, llm_model: str) -> Tuple[bool, Any, Tuple[str, ...]]:
+        """キャッシュ付きの検証（S式は不変なタプル構造で返す）"""
+        key = (raw_output, llm_model)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        is_approved, parsed_expr, errors = self._validate_uncached(raw_output, llm_model)
+        result = (is_approved, freeze_s_expression(parsed_expr) if is_approved else None, errors)
+        if len(self._result_cache) >= self._result_cache_size:
+            self._result_cache.clear()
+        self._result_cache[key] = result
+        return result
+    
+    def _validate_uncached(self, raw_output: str, llm_model: str) -> Tuple[bool, SExpression, Tuple[str, ...]]:
+        """パースとスキーマ検証（統計は更新しない）"""
         try:
             # 1. S式パース
             from .parser import parse_s_expression
@@ -291,16 +407,17 @@ class LLMOutputGate:
             )
             
             if is_valid:
-                self.allowed_count += 1
-                return True, parsed_expr, []
+                return True, parsed_expr, ()
             else:
-                self.blocked_count += 1
-                return False, None, validation_errors
+                return False, None, tuple(validation_errors)
                 
         except Exception as e:
-            self.blocked_count += 1
             error_msg = f"LLM出力の解析/検証エラー: {str(e)}"
-            return False, None, [error_msg]
+            return False, None, (error_msg,)
+    
+    def clear_cache(self) -> None:
+        """検証結果キャッシュをクリア（検証ルール変更時に使用）"""
+        self._result_cache.clear()
     
     def get_stats(self) -> Dict[str, int]:
         """統計情報を取得"""
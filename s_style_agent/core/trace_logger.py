@@ -4,6 +4,8 @@ S式実行のトレースログ機能
 JSON-L形式での実行ログ出力とメタデータ収集を提供します。
 """
 
+import array
+import atexit
 import json
 import time
 from typing import Any, Dict, List, Optional, Union
@@ -11,6 +13,11 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson 未インストール時は標準 json を使用
+    orjson = None
+
 
 class ProvenanceType(Enum):
     """実行元の種別"""
@@ -58,25 +65,62 @@ class TraceEntry:
     duration_ms: float
     explanation: str
     metadata: ExecutionMetadata
+    s_expr: Optional[str] = None  # 表示用S式文字列（input から開始時に確定、ログ出力には含めない）
     
     def to_json_line(self) -> str:
         """JSON-L形式で出力"""
         data = asdict(self)
+        del data['s_expr']
         # Enumを文字列に変換
         data['metadata']['provenance'] = data['metadata']['provenance'].value
         return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    
+    def to_json_bytes(self) -> bytes:
+        """JSON-L形式のUTF-8バイト列で出力（orjson があれば使用）"""
+        if orjson is None:
+            return self.to_json_line().encode('utf-8')
+        data = asdict(self)
+        del data['s_expr']
+        data['metadata']['provenance'] = data['metadata']['provenance'].value
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # 64ビットを超える整数（2**100 など）は orjson で扱えないため標準 json で出力
+            return self.to_json_line().encode('utf-8')
 
 
 class TraceLogger:
     """S式実行のトレースロガー"""
     
-    def __init__(self, output_file: Optional[Path] = None):
+    def __init__(self, output_file: Optional[Path] = None, buffer_size: int = 64 * 1024):
         self.output_file = output_file
+        
+        # ファイル出力バッファ（buffer_size バイトを超えたら、または flush/close 時に書き出す）
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
         self.entries: List[TraceEntry] = []
         self.current_path: List[int] = []
         
-    def start_operation(self, operation: str, input_data: Any, explanation: str = "") -> int:
-        """操作開始をログ"""
+        # 集計用の列データ（entries と同じ順序、Structure-of-Arrays）
+        self._depths = array.array('i')
+        self._durations = array.array('d')
+        self._child_counts = array.array('i')
+        
+        # パス -> 最新エントリ番号（階層メタデータを追加時に確定させるための索引）
+        self._index_by_path: Dict[tuple, int] = {}
+        
+    def start_operation(self, operation: str, input_data: Any, explanation: str = "",
+                        s_expr: Optional[str] = None) -> int:
+        """操作開始をログ
+        
+        s_expr を省略した場合、input_data が文字列ならそのまま、
+        {"s_expr": ...} 形式の辞書ならその値を表示用S式として保持する。
+        """
+        if s_expr is None:
+            if isinstance(input_data, str):
+                s_expr = input_data
+            elif isinstance(input_data, dict) and "s_expr" in input_data:
+                s_expr = str(input_data["s_expr"])
+        
         entry_id = len(self.entries)
         entry = TraceEntry(
             timestamp=self._current_timestamp(),
@@ -86,9 +130,10 @@ class TraceLogger:
             output=None,
             duration_ms=0,
             explanation=explanation,
-            metadata=ExecutionMetadata()
+            metadata=ExecutionMetadata(),
+            s_expr=s_expr
         )
-        self.entries.append(entry)
+        self._append_entry(entry)
         return entry_id
     
     def end_operation(self, entry_id: int, output: Any, metadata: Optional[ExecutionMetadata] = None):
@@ -103,8 +148,11 @@ class TraceLogger:
         # エントリを更新
         entry.output = output
         entry.duration_ms = (current_time - start_time) * 1000
+        self._durations[entry_id] = entry.duration_ms
         if metadata:
+            self._carry_hierarchy(entry.metadata, metadata)
             entry.metadata = metadata
+        self._add_subtree_duration(entry)
             
         # ファイル出力
         if self.output_file:
@@ -114,6 +162,7 @@ class TraceLogger:
         """既存エントリのメタデータを更新"""
         if entry_id < len(self.entries):
             entry = self.entries[entry_id]
+            self._carry_hierarchy(entry.metadata, metadata)
             entry.metadata = metadata
     
     def log_error(self, operation: str, input_data: Any, error: Exception, explanation: str = ""):
@@ -134,7 +183,7 @@ class TraceLogger:
             metadata=metadata
         )
         
-        self.entries.append(entry)
+        self._append_entry(entry)
         if self.output_file:
             self._write_to_file(entry)
     
@@ -155,6 +204,68 @@ class TraceLogger:
         """ログをクリア"""
         self.entries.clear()
         self.current_path.clear()
+        del self._depths[:]
+        del self._durations[:]
+        del self._child_counts[:]
+        self._index_by_path.clear()
+    
+    def _append_entry(self, entry: TraceEntry):
+        """エントリと集計用の列データを追加し、階層メタデータを確定"""
+        entry_id = len(self.entries)
+        path = entry.path
+        metadata = entry.metadata
+        metadata.depth = len(path)
+        
+        if path:
+            metadata.parent_path = path[:-1]
+            
+            # 直接の親の子ノード数を更新
+            parent_id = self._index_by_path.get(tuple(path[:-1]))
+            if parent_id is not None:
+                parent_meta = self.entries[parent_id].metadata
+                parent_meta.has_children = True
+                parent_meta.child_count += 1
+                self._child_counts[parent_id] += 1
+            
+            # 祖先のサブツリー操作数を更新（サブツリーは自身を含む）
+            for ancestor in self._ancestors(path):
+                ancestor_meta = ancestor.metadata
+                ancestor_meta.subtree_operation_count = (ancestor_meta.subtree_operation_count or 1) + 1
+        
+        self.entries.append(entry)
+        self._depths.append(len(path))
+        self._durations.append(entry.duration_ms)
+        self._child_counts.append(0)
+        self._index_by_path[tuple(path)] = entry_id
+    
+    def _ancestors(self, path: List[int]):
+        """パスの祖先エントリ（ルート側から順に）を列挙"""
+        for depth in range(len(path)):
+            ancestor_id = self._index_by_path.get(tuple(path[:depth]))
+            if ancestor_id is not None:
+                yield self.entries[ancestor_id]
+    
+    def _add_subtree_duration(self, entry: TraceEntry):
+        """終了したエントリの実行時間を自身と祖先のサブツリー時間に加算"""
+        duration = entry.duration_ms if entry.duration_ms > 0 else 0
+        if entry.metadata.subtree_duration_ms is not None:
+            entry.metadata.subtree_duration_ms += duration
+        
+        for ancestor in self._ancestors(entry.path):
+            ancestor_meta = ancestor.metadata
+            if ancestor_meta.subtree_duration_ms is None:
+                ancestor_meta.subtree_duration_ms = ancestor.duration_ms if ancestor.duration_ms > 0 else 0
+            ancestor_meta.subtree_duration_ms += duration
+    
+    @staticmethod
+    def _carry_hierarchy(old: ExecutionMetadata, new: ExecutionMetadata):
+        """メタデータ差し替え時に確定済みの階層情報を引き継ぐ"""
+        new.depth = old.depth
+        new.parent_path = old.parent_path
+        new.has_children = old.has_children
+        new.child_count = old.child_count
+        new.subtree_duration_ms = old.subtree_duration_ms
+        new.subtree_operation_count = old.subtree_operation_count
     
     def _current_timestamp(self) -> str:
         """現在のタイムスタンプを取得"""
@@ -166,100 +277,59 @@ class TraceLogger:
         return time.time()
     
     def _write_to_file(self, entry: TraceEntry):
-        """ファイルに書き込み"""
+        """ファイル出力バッファに追加（閾値を超えたら書き出し）"""
         try:
-            with open(self.output_file, 'a', encoding='utf-8') as f:
-                f.write(entry.to_json_line() + '\n')
+            line = entry.to_json_bytes()
         except Exception as e:
             print(f"ログ書き込みエラー: {e}")
-
-    def analyze_tree_structure(self) -> None:
-        """エントリ全体の階層構造を分析してメタデータを更新"""
-        # パス -> エントリマップを作成
-        path_to_entries: Dict[tuple, List[TraceEntry]] = {}
-        for entry in self.entries:
-            path_tuple = tuple(entry.path)
-            if path_tuple not in path_to_entries:
-                path_to_entries[path_tuple] = []
-            path_to_entries[path_tuple].append(entry)
+            return
         
-        # 各エントリの階層情報を更新
-        for entry in self.entries:
-            self._update_hierarchy_metadata(entry, path_to_entries)
+        self._buffer += line
+        self._buffer += b'\n'
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
     
-    def _update_hierarchy_metadata(self, entry: TraceEntry, path_to_entries: Dict[tuple, List[TraceEntry]]) -> None:
-        """個別エントリの階層メタデータを更新"""
-        path_tuple = tuple(entry.path)
-        
-        # 深度を設定
-        entry.metadata.depth = len(entry.path)
-        
-        # 親パスを設定
-        if entry.path:
-            entry.metadata.parent_path = entry.path[:-1]
-        
-        # 子ノードを検索
-        children = self._find_child_entries(entry, path_to_entries)
-        entry.metadata.has_children = len(children) > 0
-        entry.metadata.child_count = len(children)
-        
-        # サブツリー統計を計算
-        if children:
-            self._calculate_subtree_stats(entry, children)
+    def flush(self):
+        """バッファ済みのログをファイルに書き出し"""
+        if not self._buffer or not self.output_file:
+            return
+        try:
+            with open(self.output_file, 'ab') as f:
+                f.write(self._buffer)
+        except Exception as e:
+            print(f"ログ書き込みエラー: {e}")
+        finally:
+            self._buffer.clear()
     
-    def _find_child_entries(self, parent_entry: TraceEntry, path_to_entries: Dict[tuple, List[TraceEntry]]) -> List[TraceEntry]:
-        """指定エントリの直接の子エントリを検索"""
-        children = []
-        parent_path_len = len(parent_entry.path)
-        
-        for entry in self.entries:
-            # 子ノードの条件: パスの長さが親+1で、先頭部分が親パスと一致
-            if (len(entry.path) == parent_path_len + 1 and 
-                entry.path[:parent_path_len] == parent_entry.path):
-                children.append(entry)
-        
-        return children
+    def close(self):
+        """ロガーを閉じる（未書き出しのログを出力）"""
+        self.flush()
     
-    def _calculate_subtree_stats(self, parent_entry: TraceEntry, children: List[TraceEntry]) -> None:
-        """サブツリーの統計情報を計算"""
-        # サブツリー内のすべてのエントリを収集
-        subtree_entries = self._collect_subtree_entries(parent_entry)
-        
-        # 合計実行時間を計算
-        total_duration = sum(entry.duration_ms for entry in subtree_entries if entry.duration_ms > 0)
-        parent_entry.metadata.subtree_duration_ms = total_duration
-        
-        # 操作数をカウント
-        parent_entry.metadata.subtree_operation_count = len(subtree_entries)
-    
-    def _collect_subtree_entries(self, root_entry: TraceEntry) -> List[TraceEntry]:
-        """指定エントリをルートとするサブツリー内のすべてのエントリを収集"""
-        subtree_entries = []
-        root_path = root_entry.path
-        
-        for entry in self.entries:
-            # サブツリーの条件: パスが親パスで始まる（親パス含む）
-            if (len(entry.path) >= len(root_path) and 
-                entry.path[:len(root_path)] == root_path):
-                subtree_entries.append(entry)
+    def __del__(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def analyze_tree_structure(self) -> None:
+        """階層構造を分析（互換用）
         
-        return subtree_entries
+        階層メタデータはエントリ追加・終了時に確定済みのため何もしない。
+        """
     
     def get_tree_summary(self) -> Dict[str, Any]:
         """ツリー構造のサマリーを取得"""
-        self.analyze_tree_structure()
-        
-        # 深度別統計
+        # 深度別統計（列データから集計）
         depth_stats = {}
         total_operations = len(self.entries)
-        total_duration = sum(entry.duration_ms for entry in self.entries if entry.duration_ms > 0)
+        total_duration = sum(d for d in self._durations if d > 0)
         
-        for entry in self.entries:
-            depth = entry.metadata.depth
-            if depth not in depth_stats:
-                depth_stats[depth] = {"count": 0, "duration_ms": 0}
-            depth_stats[depth]["count"] += 1
-            depth_stats[depth]["duration_ms"] += entry.duration_ms or 0
+        for depth, duration in zip(self._depths, self._durations):
+            stats = depth_stats.get(depth)
+            if stats is None:
+                stats = depth_stats[depth] = {"count": 0, "duration_ms": 0}
+            stats["count"] += 1
+            stats["duration_ms"] += duration
         
         return {
             "total_operations": total_operations,
@@ -271,21 +341,15 @@ class TraceLogger:
     
     def _calculate_tree_complexity(self) -> Dict[str, int]:
         """ツリーの複雑度指標を計算"""
-        complexity = {
-            "leaf_nodes": 0,       # 葉ノード数
-            "branch_nodes": 0,     # 分岐ノード数
-            "max_children": 0,     # 最大子ノード数
+        child_counts = self._child_counts
+        leaf_nodes = child_counts.count(0)
+        
+        return {
+            "leaf_nodes": leaf_nodes,                              # 葉ノード数
+            "branch_nodes": len(child_counts) - leaf_nodes,        # 分岐ノード数
+            "max_children": max(child_counts, default=0),          # 最大子ノード数
             "total_nodes": len(self.entries)
         }
-        
-        for entry in self.entries:
-            if entry.metadata.has_children:
-                complexity["branch_nodes"] += 1
-                complexity["max_children"] = max(complexity["max_children"], entry.metadata.child_count)
-            else:
-                complexity["leaf_nodes"] += 1
-        
-        return complexity
 
 
 # グローバルロガーインスタンス
@@ -303,9 +367,18 @@ def get_global_logger() -> TraceLogger:
 def set_global_logger(logger: TraceLogger):
     """グローバルロガーを設定"""
     global _global_logger
+    if _global_logger is not None and _global_logger is not logger:
+        _global_logger.flush()
     _global_logger = logger
 
 
+@atexit.register
+def _flush_global_logger():
+    """終了時にグローバルロガーのバッファを書き出し"""
+    if _global_logger is not None:
+        _global_logger.flush()
+
+
 def configure_trace_logging(output_file: Optional[Union[str, Path]] = None) -> TraceLogger:
     """トレースログを設定"""
     output_path = Path(output_file) if output_file else None
@@ -4,6 +4,7 @@ MCP 統合管理クラス
 MCPサーバー管理、ツール登録、S式評価器統合の全体統制
 """
 
+import asyncio
 from typing import Dict, List, Any, Optional
 from langsmith import traceable
 
@@ -37,23 +38,12 @@ class MCPManager:
                 print("[MCP] 設定されたサーバーがありません")
                 return True
             
-            # 自動起動サーバーを堅牢なクライアントで起動
+            # 自動起動サーバーを堅牢なクライアントで起動（起動待ちを重ねるため並行実行）
             autostart_servers = mcp_config_loader.get_autostart_servers()
-            success_count = 0
-            
-            for server_config in autostart_servers:
-                try:
-                    success = await robust_mcp_client.start_server(
-                        server_id=server_config.id,
-                        command=server_config.command,
-                        args=server_config.args,
-                        env=server_config.env
-                    )
-                    if success:
-                        success_count += 1
-                        print(f"[MCP] サーバー '{server_config.id}' を堅牢クライアントで起動しました")
-                except Exception as e:
-                    print(f"[MCP] サーバー '{server_config.id}' の起動でエラー: {e}")
+            results = await asyncio.gather(
+                *(self._start_autostart_server(server_config) for server_config in autostart_servers)
+            )
+            success_count = sum(1 for success in results if success)
             
             if success_count > 0:
                 self.initialized = True
@@ -70,6 +60,22 @@ class MCPManager:
             print(f"[MCP] システム初期化でエラー: {e}")
             return False
     
+    async def _start_autostart_server(self, server_config) -> bool:
+        """自動起動サーバーを1つ起動（例外は起動失敗として扱う）"""
+        try:
+            success = await robust_mcp_client.start_server(
+                server_id=server_config.id,
+                command=server_config.command,
+                args=server_config.args,
+                env=server_config.env
+            )
+            if success:
+                print(f"[MCP] サーバー '{server_config.id}' を堅牢クライアントで起動しました")
+            return success
+        except Exception as e:
+            print(f"[MCP] サーバー '{server_config.id}' の起動でエラー: {e}")
+            return False
+    
     async def shutdown(self) -> None:
         """MCP システムを終了"""
         print("[MCP] システムを終了中...")
@@ -90,6 +96,14 @@ class MCPManager:
     def get_system_status(self) -> Dict[str, Any]:
         """MCP システムの全体ステータス"""
         tools = robust_mcp_client.list_tools()
+        
+        # サーバー別ツール数をツール情報の1回の走査で集計
+        server_tool_counts = dict.fromkeys(robust_mcp_client.servers.keys(), 0)
+        for tool in tools:
+            info = robust_mcp_client.get_tool_info(tool)
+            if info and info.server_id in server_tool_counts:
+                server_tool_counts[info.server_id] += 1
+        
         return {
             "initialized": self.initialized,
             "servers_started": self.servers_started,
@@ -97,10 +111,7 @@ class MCPManager:
             "active_servers": list(robust_mcp_client.servers.keys()),
             "tool_statistics": {
                 "total_tools": len(tools),
-                "servers": {
-                    server_id: len([t for t in tools if robust_mcp_client.get_tool_info(t) and robust_mcp_client.get_tool_info(t).server_id == server_id])
-                    for server_id in robust_mcp_client.servers.keys()
-                }
+                "servers": server_tool_counts
             }
         }
     
@@ -4,9 +4,54 @@ pytest設定ファイル
 S式エージェントシステムのテスト用共通設定
 """
 
+import copy
 import sys
 from pathlib import Path
 
+import pytest
+
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
\ No newline at end of file
+sys.path.insert(0, str(project_root))
+
+
+def _clone_frontend(prototype):
+    """プロトタイプを浅くコピーし、テストが変更する AgentService と履歴だけ分離"""
+    clone = copy.copy(prototype)
+    if hasattr(prototype, "agent_service"):
+        clone.agent_service = copy.copy(prototype.agent_service)
+        clone.agent_service.session_history = []
+        clone.session_history = clone.agent_service.session_history
+    else:
+        clone.session_history = []
+    return clone
+
+
+@pytest.fixture(scope="session")
+def _cli_prototype():
+    """セッション共有の CLI インスタンス（直接使わず cli フィクスチャ経由で複製）"""
+    from s_style_agent.cli.main import SStyleAgentCLI
+    return SStyleAgentCLI(
+        llm_base_url="http://test:1234/v1",
+        model_name="test-model",
+        use_async=True
+    )
+
+
+@pytest.fixture(scope="session")
+def _tui_prototype():
+    """セッション共有の TUI アプリ（直接使わず tui_app フィクスチャ経由で複製）"""
+    from s_style_agent.ui.main_app import MainTUIApp
+    return MainTUIApp()
+
+
+@pytest.fixture
+def cli(_cli_prototype):
+    """テスト用CLIインスタンス"""
+    return _clone_frontend(_cli_prototype)
+
+
+@pytest.fixture
+def tui_app(_tui_prototype):
+    """テスト用TUIアプリインスタンス"""
+    return _clone_frontend(_tui_prototype)
@@ -3,14 +3,14 @@
 実際の検索テスト（レート制限注意）
 """
 import asyncio
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
 
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_actual_search():
     """実際の検索テスト（1回のみ、レート制限考慮）"""
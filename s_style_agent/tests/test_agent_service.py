@@ -6,13 +6,27 @@ CLI/TUI共通機能の包括的テスト
 
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
 from typing import Dict, Any
 
 from ..core.agent_service import AgentService
 from ..core.parser import SExpressionParseError
 
 
+# test_test_tools 用のツール別モック結果
+_TOOL_RESULTS = {
+    "(calc \"2+2\")": 4,
+    "(notify \"テスト通知\")": None,
+    "(math \"x + 2\" \"x=3\")": 5
+}
+
+
+async def _mock_evaluate(s_expr, context=None):
+    """evaluate_s_expression の代替（_TOOL_RESULTS から結果を返す）"""
+    return _TOOL_RESULTS.get(s_expr, "unknown")
+
+
 class TestAgentService:
     """AgentService のテストクラス"""
     
@@ -44,12 +58,14 @@ class TestAgentService:
         assert hasattr(agent_service, 'llm')
         assert hasattr(agent_service, 'async_evaluator')
         assert hasattr(agent_service, 'async_global_env')
+        assert not hasattr(agent_service, 'evaluator')
     
     def test_sync_initialization(self, sync_agent_service):
         """同期モード初期化テスト"""
         assert sync_agent_service.use_async is False
         assert hasattr(sync_agent_service, 'evaluator')
         assert hasattr(sync_agent_service, 'global_env')
+        assert not hasattr(sync_agent_service, 'async_evaluator')
 
     @pytest.mark.asyncio
     async def test_evaluate_s_expression_success(self, agent_service):
@@ -94,8 +110,7 @@ class TestAgentService:
     async def test_generate_s_expression(self, agent_service):
         """S式生成テスト"""
         # Mock LLM response
-        mock_response = Mock()
-        mock_response.content = "(calc \"2+3\")"
+        mock_response = SimpleNamespace(content="(calc \"2+3\")")
         agent_service.llm.ainvoke = AsyncMock(return_value=mock_response)
         
         result = await agent_service.generate_s_expression("calculate 2 plus 3")
@@ -168,6 +183,7 @@ class TestAgentService:
         
         assert agent_service.use_async != original_mode
         assert new_mode == ("sync" if original_mode else "async")
+        assert hasattr(agent_service, 'evaluator')
         assert len(agent_service.session_history) == 1
         
         history_entry = agent_service.session_history[0]
@@ -181,9 +197,8 @@ class TestAgentService:
         agent_service.async_evaluator.evaluate_with_context = AsyncMock(return_value=mock_result)
         
         # Temporarily create sync evaluator for test
-        agent_service.evaluator = Mock()
-        agent_service.global_env = Mock()
-        agent_service.evaluator.evaluate_with_context = Mock(return_value=mock_result)
+        agent_service.evaluator = SimpleNamespace(evaluate_with_context=lambda *args, **kwargs: mock_result)
+        agent_service.global_env = SimpleNamespace()
         
         with patch('s_style_agent.core.parser.parse_s_expression') as mock_parse:
             mock_parse.return_value = ["calc", "test"]
@@ -224,17 +239,7 @@ class TestAgentService:
     @pytest.mark.asyncio
     async def test_test_tools(self, agent_service):
         """ツールテスト機能のテスト"""
-        # Mock evaluate_s_expression for different tools
-        mock_results = {
-            "(calc \"2+2\")": 4,
-            "(notify \"テスト通知\")": None,
-            "(math \"x + 2\" \"x=3\")": 5
-        }
-        
-        async def mock_evaluate(s_expr, context=None):
-            return mock_results.get(s_expr, "unknown")
-        
-        agent_service.evaluate_s_expression = mock_evaluate
+        agent_service.evaluate_s_expression = _mock_evaluate
         
         result = await agent_service.test_tools()
         
@@ -293,23 +298,20 @@ class TestAgentServiceIntegration:
     async def test_full_workflow(self, agent_service):
         """完全なワークフローテスト"""
         # 1. S式生成
-        with patch.object(agent_service.llm, 'ainvoke') as mock_llm:
-            mock_response = Mock()
-            mock_response.content = "(calc \"5+3\")"
-            mock_llm.return_value = mock_response
-            
-            generated = await agent_service.generate_s_expression("calculate 5 plus 3")
-            assert generated == "(calc \"5+3\")"
+        mock_response = SimpleNamespace(content="(calc \"5+3\")")
+        agent_service.llm.ainvoke = AsyncMock(return_value=mock_response)
+        
+        generated = await agent_service.generate_s_expression("calculate 5 plus 3")
+        assert generated == "(calc \"5+3\")"
+        
+        # 2. S式評価（インスタンスはテストごとに破棄されるため元に戻さない）
+        agent_service.async_evaluator.evaluate_with_context = AsyncMock(return_value=8)
         
-        # 2. S式評価
-        with patch.object(agent_service.async_evaluator, 'evaluate_with_context') as mock_eval:
-            mock_eval.return_value = 8
+        with patch('s_style_agent.core.parser.parse_s_expression') as mock_parse:
+            mock_parse.return_value = ["calc", "5+3"]
             
-            with patch('s_style_agent.core.parser.parse_s_expression') as mock_parse:
-                mock_parse.return_value = ["calc", "5+3"]
-                
-                result = await agent_service.evaluate_s_expression(generated)
-                assert result == 8
+            result = await agent_service.evaluate_s_expression(generated)
+            assert result == 8
         
         # 3. 履歴確認
         history = agent_service.get_session_history()
@@ -325,11 +327,10 @@ class TestAgentServiceIntegration:
     async def test_error_handling_workflow(self, agent_service):
         """エラーハンドリングワークフローテスト"""
         # 生成エラー
-        with patch.object(agent_service.llm, 'ainvoke') as mock_llm:
-            mock_llm.side_effect = Exception("LLM Error")
-            
-            with pytest.raises(Exception, match="LLM Error"):
-                await agent_service.generate_s_expression("test")
+        agent_service.llm.ainvoke = AsyncMock(side_effect=Exception("LLM Error"))
+        
+        with pytest.raises(Exception, match="LLM Error"):
+            await agent_service.generate_s_expression("test")
         
         # 評価エラー
         with patch('s_style_agent.core.parser.parse_s_expression') as mock_parse:
@@ -3,13 +3,14 @@
 MCP自動初期化機能のテスト
 """
 import asyncio
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.cli.main import SStyleAgentCLI
 
+# 実MCPサーバーに接続するため -m "not mcp_network" で除外できるようにする
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_auto_init():
     """MCP自動初期化テスト"""
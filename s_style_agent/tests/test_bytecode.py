@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+while ループのバイトコード実行テスト
+"""
+
+import pytest
+
+from s_style_agent.config.settings import Settings, settings
+from s_style_agent.core import evaluator as evaluator_module
+from s_style_agent.core.bytecode import compile_while, execute_bytecode
+from s_style_agent.core.evaluator import ContextualEvaluator, Environment
+from s_style_agent.core.parser import parse_s_expression
+
+
+def _compile(s_expr: str, env: Environment):
+    _, condition, body, *_ = parse_s_expression(s_expr)
+    return compile_while(condition, body, env)
+
+
+class TestBytecodeWhile:
+    """バイトコード版 while のテスト"""
+
+    def test_counter_loop(self):
+        """カウンタループが木構造評価と同じ結果になる"""
+        env = Environment()
+        env.define("count", 0)
+        compiled = _compile('(while (< count 100) (set count (+ count 1)) 5)', env)
+
+        assert compiled is not None
+        assert execute_bytecode(compiled, env, 5) == 5
+        assert env.lookup("count") == 5
+
+    def test_seq_and_add(self):
+        """seq の結果は最後の式、+ は左から加算"""
+        env = Environment()
+        env.define("i", 0)
+        env.define("total", 0)
+        compiled = _compile(
+            '(while (< i 4) (seq (set total (+ total i 10)) (set i (+ i 1))) 10)', env
+        )
+
+        assert execute_bytecode(compiled, env, 10) == 4
+        assert env.lookup("total") == 46
+
+    def test_parent_environment_is_updated(self):
+        """親環境の変数への代入が反映される"""
+        parent = Environment()
+        parent.define("count", 0)
+        env = Environment(parent=parent)
+        compiled = _compile('(while (< count 3) (set count (+ count 1)) 10)', env)
+
+        execute_bytecode(compiled, env, 10)
+        assert parent.lookup("count") == 3
+
+    def test_unsupported_body_falls_back(self):
+        """対応外の構文を含むループはコンパイルしない"""
+        env = Environment()
+        assert _compile('(while (< 1 2) (notify "test") 5)', env) is None
+        assert _compile('(while (< 1 2) (set undefined_var 1) 5)', env) is None
+
+    def test_compiled_code_is_cached(self):
+        """同じS式・同じ束縛ならコンパイル結果を再利用"""
+        env = Environment()
+        env.define("count", 0)
+        s_expr = '(while (< count 10) (set count (+ count 1)) 10)'
+
+        assert _compile(s_expr, env) is _compile(s_expr, env)
+
+    def test_counter_loop_closed_form(self):
+        """単純カウンタループは反復せずに同じ結果を返す"""
+        for start, limit, step, max_iterations in [(0, 100, 1, 5), (0, 100, 3, 1000), (7, 7, 1, 10), (0, 10000, 1, 10000)]:
+            env = Environment()
+            env.define("count", start)
+            compiled = _compile(f'(while (< count {limit}) (set count (+ count {step})) 10)', env)
+            assert compiled.counter is not None
+
+            expected_count, expected_result, iterations = start, None, 0
+            while iterations < max_iterations and expected_count < limit:
+                expected_count += step
+                expected_result = expected_count
+                iterations += 1
+
+            assert execute_bytecode(compiled, env, max_iterations) == expected_result
+            assert env.lookup("count") == expected_count
+
+
+@pytest.fixture
+def bytecode_calls(monkeypatch):
+    """トレースを無効化し、評価器からのバイトコード実行を記録する"""
+    monkeypatch.setattr(settings.system, "trace_enabled", False)
+    calls = []
+
+    def spy(compiled, env, max_iterations):
+        calls.append(compiled)
+        return execute_bytecode(compiled, env, max_iterations)
+
+    monkeypatch.setattr(evaluator_module, "execute_bytecode", spy)
+    return calls
+
+
+def _evaluate(s_expr: str, **bindings):
+    env = Environment()
+    for name, value in bindings.items():
+        env.define(name, value)
+    result = ContextualEvaluator().evaluate_with_context(parse_s_expression(s_expr), env)
+    return result, env
+
+
+class TestEvaluatorBytecodeGate:
+    """ContextualEvaluator 経由のバイトコード実行のテスト"""
+
+    def test_trace_enabled_env_var(self, monkeypatch):
+        """TRACE_ENABLED=false でトレースが無効になる"""
+        monkeypatch.setenv("TRACE_ENABLED", "false")
+        assert Settings().system.trace_enabled is False
+        monkeypatch.setenv("TRACE_ENABLED", "true")
+        assert Settings().system.trace_enabled is True
+
+    def test_trace_disabled_uses_bytecode(self, bytecode_calls):
+        """トレース無効時は対応するループをバイトコードで実行"""
+        result, env = _evaluate(
+            '(while (< i 4) (seq (set total (+ total i 10)) (set i (+ i 1))) 10)', i=0, total=0
+        )
+
+        assert len(bytecode_calls) == 1
+        assert result == 4
+        assert env.lookup("total") == 46
+
+    def test_trace_enabled_uses_tree_walk(self, monkeypatch, bytecode_calls):
+        """トレース有効時はバイトコードを使わず、結果は同じ"""
+        monkeypatch.setattr(settings.system, "trace_enabled", True)
+        result, env = _evaluate(
+            '(while (< i 4) (seq (set total (+ total i 10)) (set i (+ i 1))) 10)', i=0, total=0
+        )
+
+        assert bytecode_calls == []
+        assert result == 4
+        assert env.lookup("total") == 46
+
+    def test_unsupported_loop_falls_back(self, bytecode_calls):
+        """対応外の構文を含むループはトレース無効時も木構造評価"""
+        _, env = _evaluate('(while (< count 3) (seq (notify "tick") (set count (+ count 1))) 10)', count=0)
+
+        assert bytecode_calls == []
+        assert env.lookup("count") == 3
+
+    def test_counter_loop_closed_form_via_evaluator(self, monkeypatch, bytecode_calls):
+        """評価器経由の単純カウンタループは閉じた式で計算され、木構造評価と同じ結果になる"""
+        for limit, step, max_iterations in [(100, 1, 5), (100, 3, 1000), (0, 1, 10), (10000, 7, 10000)]:
+            s_expr = f'(while (< count {limit}) (set count (+ count {step})) {max_iterations})'
+
+            monkeypatch.setattr(settings.system, "trace_enabled", True)
+            expected_result, expected_env = _evaluate(s_expr, count=0)
+            monkeypatch.setattr(settings.system, "trace_enabled", False)
+            result, env = _evaluate(s_expr, count=0)
+
+            assert bytecode_calls[-1].counter is not None
+            assert result == expected_result
+            assert env.lookup("count") == expected_env.lookup("count")
@@ -3,14 +3,15 @@
 CLI経由での検索結果抽出テスト（1回のみ）
 """
 import asyncio
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
 
+# 実MCPサーバーに接続するため -m "not mcp_network" で除外できるようにする
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_cli_extraction():
     """CLI経由での抽出テスト"""
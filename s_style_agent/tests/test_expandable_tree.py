@@ -4,17 +4,12 @@
 """
 
 # import pytest  # Not required for basic testing
-import sys
 from pathlib import Path
 import tempfile
 import time
 
-# プロジェクトルートを追加
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from s_style_agent.core.trace_logger import TraceLogger, TraceEntry, ExecutionMetadata, ProvenanceType
-from s_style_agent.ui.trace_viewer import ExpandableTraceNode
+from s_style_agent.ui.trace_viewer import ExpandableTraceNode, build_tree
 
 
 class TestExpandableTraceNode:
@@ -47,8 +42,8 @@ class TestExpandableTraceNode:
         assert child2.parent_node == parent
         assert child1.depth == 1
         assert child2.depth == 1
-        assert child1.path == [0]
-        assert child2.path == [1]
+        assert child1.path == (0,)
+        assert child2.path == (1,)
     
     def test_expansion_toggle(self):
         """展開/折りたたみ切り替えテスト"""
@@ -65,12 +60,14 @@ class TestExpandableTraceNode:
         assert result == False
         assert node.is_expanded == False
         assert len(node.get_visible_children()) == 0
+        assert node.visible_child_count == 0
         
         # 再展開
         result = node.toggle_expansion()
         assert result == True
         assert node.is_expanded == True
         assert len(node.get_visible_children()) == 1
+        assert node.visible_child_count == 1
     
     def test_status_emojis(self):
         """ステータス絵文字テスト"""
@@ -138,6 +135,20 @@ class TestExpandableTraceNode:
         assert root.find_node_by_path([0, 0]) == grandchild
         assert root.find_node_by_path([2]) is None  # 存在しないパス
     
+    def test_path_search_cache_invalidation(self):
+        """パス検索キャッシュが子ノード追加後も正しい結果を返すテスト"""
+        root = ExpandableTraceNode("root", "(root)")
+        child = root.add_child(ExpandableTraceNode("child", "(child)"))
+        
+        assert root.find_node_by_path([0]) is child
+        assert root.find_node_by_path([0, 0]) is None
+        
+        grandchild = child.add_child(ExpandableTraceNode("grandchild", "(grandchild)"))
+        
+        assert root.find_node_by_path([0, 0]) is grandchild
+        assert child.find_node_by_path([0]) is grandchild
+        assert root._path_cache[(0, 0)] is grandchild
+    
     def test_serialization(self):
         """シリアライゼーションテスト"""
         parent = ExpandableTraceNode("parent", "(parent)")
@@ -161,6 +172,24 @@ class TestExpandableTraceNode:
         assert restored.duration_ms == parent.duration_ms
         assert len(restored.children) == 1
         assert restored.children[0].operation == "child"
+    
+    def test_packed_serialization(self):
+        """フラット形式シリアライゼーションテスト"""
+        root = ExpandableTraceNode("root", "(root)")
+        child1 = root.add_child(ExpandableTraceNode("child1", "(child1)"))
+        root.add_child(ExpandableTraceNode("child2", "(child2)"))
+        child1.add_child(ExpandableTraceNode("grandchild", "(grandchild)"))
+        child1.is_expanded = False
+        root.set_execution_status("completed", 12.5, 42)
+        
+        records = root.to_packed()
+        assert [r[0] for r in records] == ["root", "child1", "grandchild", "child2"]
+        assert [r[-1] for r in records] == [2, 1, 0, 0]
+        
+        restored = ExpandableTraceNode.from_packed(records)
+        assert restored.to_dict() == root.to_dict()
+        assert restored.find_node_by_path([0, 0]).operation == "grandchild"
+        assert restored.children[0].is_expanded is False
 
 
 class TestTraceLoggerHierarchy:
@@ -190,10 +219,7 @@ class TestTraceLoggerHierarchy:
             logger.end_operation(child2_id, "notified")
             logger.pop_path()
             
-            # 階層構造を分析
-            logger.analyze_tree_structure()
-            
-            # 検証
+            # 階層メタデータは追加時に確定済み（analyze_tree_structure 不要）
             root_entry = logger.entries[0]
             child1_entry = logger.entries[1]
             child2_entry = logger.entries[2]
@@ -203,6 +229,8 @@ class TestTraceLoggerHierarchy:
             assert root_entry.metadata.parent_path is None
             assert root_entry.metadata.has_children == True
             assert root_entry.metadata.child_count == 2
+            assert root_entry.metadata.subtree_operation_count == 3
+            assert root_entry.metadata.subtree_duration_ms is not None
             
             # 子エントリ1
             assert child1_entry.metadata.depth == 1
@@ -218,6 +246,34 @@ class TestTraceLoggerHierarchy:
         finally:
             temp_file.unlink(missing_ok=True)
     
+    def test_buffered_file_output(self):
+        """ファイル出力がバッファされ flush/close で書き出されるテスト"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.jsonl') as f:
+            temp_file = Path(f.name)
+        
+        try:
+            logger = TraceLogger(temp_file)
+            for i in range(3):
+                entry_id = logger.start_operation("calc", f"(calc {i})")
+                logger.end_operation(entry_id, i)
+            
+            # 閾値未満のためまだ書き出されていない
+            assert temp_file.read_text(encoding='utf-8') == ""
+            
+            logger.close()
+            lines = temp_file.read_text(encoding='utf-8').splitlines()
+            assert len(lines) == 3
+            assert '"output":2' in lines[2]
+            
+            # 閾値を超えると自動で書き出される
+            small_logger = TraceLogger(temp_file, buffer_size=1)
+            entry_id = small_logger.start_operation("notify", "(notify done)")
+            small_logger.end_operation(entry_id, "done")
+            assert len(temp_file.read_text(encoding='utf-8').splitlines()) == 4
+        
+        finally:
+            temp_file.unlink(missing_ok=True)
+    
     def test_tree_summary(self):
         """ツリーサマリー機能テスト"""
         logger = TraceLogger()
@@ -272,21 +328,18 @@ def test_integration():
     # 階層構造を分析
     logger.analyze_tree_structure()
     
-    # ExpandableTraceNodeツリーを構築（簡易版）
+    # ExpandableTraceNodeツリーを構築
     entries = logger.get_recent_entries(10)
-    root_node = ExpandableTraceNode("root", "S式実行ルート")
-    
-    # エントリからノードを作成
-    for entry in entries:
-        if not entry.path:  # ルートレベル
-            node = ExpandableTraceNode(entry.operation, str(entry.input))
-            node.set_execution_status("completed", entry.duration_ms, entry.output)
-            root_node.add_child(node)
+    root_node = build_tree(entries)
     
     assert len(root_node.children) == 1
     seq_node = root_node.children[0]
     assert seq_node.operation == "seq"
     assert seq_node.execution_status == "completed"
+    assert [child.operation for child in seq_node.children] == ["calc", "notify"]
+    assert seq_node.s_expr == "(seq (calc 5 * 6) (notify result))"
+    assert [child.s_expr for child in seq_node.children] == ["(calc 5 * 6)", "(notify result)"]
+    assert seq_node.children[0].result == 30
 
 
 if __name__ == "__main__":
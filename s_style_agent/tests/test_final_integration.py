@@ -5,10 +5,15 @@
 
 import os
 import asyncio
+from time import perf_counter_ns
 from s_style_agent.core.schema_validator import LLMOutputGate
 from s_style_agent.core.evaluator import ContextualEvaluator, Environment
 from s_style_agent.core.parser import parse_s_expression
 
+# 評価器はテスト間で再利用し、環境は各テストの開始時にリセットする
+_EVALUATOR = ContextualEvaluator()
+_ENV = Environment()
+
 # LangSmith設定
 os.environ['LANGSMITH_PROJECT'] = 's-style-agent'
 os.environ['LANGSMITH_TRACING'] = 'true'
@@ -21,8 +26,9 @@ async def test_end_to_end_workflow():
     gate = LLMOutputGate(validation_level="strict")
     
     # 2. 評価器初期化
-    evaluator = ContextualEvaluator()
-    env = Environment()
+    evaluator = _EVALUATOR
+    env = _ENV
+    env.reset()
     
     # 3. LLM出力シミュレーション（安全なS式）
     safe_llm_outputs = [
@@ -33,22 +39,38 @@ async def test_end_to_end_workflow():
         '(par (calc "10+5") (calc "20*2") (calc "100/4"))'
     ]
     
-    print("\n1. 安全なS式の処理:")
-    for i, output in enumerate(safe_llm_outputs, 1):
-        print(f"\n  {i}. LLM出力: {output}")
-        
+    # 検証・実行は同期処理のためスレッドで並行実行し、LangSmith送信の待ち時間を重ねる
+    sem = asyncio.Semaphore(8)
+    
+    def _process(output):
         # ゲート検証
         is_approved, parsed_expr, gate_errors = gate.validate_llm_output(output, "integration-test")
+        if not is_approved:
+            return False, None, None, gate_errors
+        
+        try:
+            # S式実行
+            return True, evaluator.evaluate_with_context(parsed_expr, env), None, []
+        except Exception as e:
+            return True, None, e, []
+    
+    async def _one(output):
+        async with sem:
+            return await asyncio.to_thread(_process, output)
+    
+    results = await asyncio.gather(*(_one(output) for output in safe_llm_outputs))
+    
+    # 出力順を保つため結果はメインタスクでまとめて表示
+    print("\n1. 安全なS式の処理:")
+    for i, (output, (is_approved, result, error, gate_errors)) in enumerate(zip(safe_llm_outputs, results), 1):
+        print(f"\n  {i}. LLM出力: {output}")
         
         if is_approved:
             print(f"      🔐 ゲート: ✅ 承認")
-            
-            try:
-                # S式実行
-                result = evaluator.evaluate_with_context(parsed_expr, env)
+            if error is None:
                 print(f"      🚀 実行結果: {result}")
-            except Exception as e:
-                print(f"      ❌ 実行エラー: {e}")
+            else:
+                print(f"      ❌ 実行エラー: {error}")
         else:
             print(f"      🔐 ゲート: ❌ 拒否")
             for error in gate_errors[:1]:
@@ -69,13 +91,19 @@ async def test_security_blocking():
         '(unknown_dangerous_op "payload")'
     ]
     
+    sem = asyncio.Semaphore(8)
+    
+    async def _one(output):
+        async with sem:
+            return await asyncio.to_thread(gate.validate_llm_output, output, "security-test")
+    
+    results = await asyncio.gather(*(_one(output) for output in malicious_outputs))
+    
     print("\n2. 危険なS式のブロック:")
     blocked_count = 0
-    for i, output in enumerate(malicious_outputs, 1):
+    for i, (output, (is_approved, _, gate_errors)) in enumerate(zip(malicious_outputs, results), 1):
         print(f"\n  {i}. 危険な出力: {output[:50]}...")
         
-        is_approved, _, gate_errors = gate.validate_llm_output(output, "security-test")
-        
         if not is_approved:
             blocked_count += 1
             print(f"      🛡️ セキュリティ: ✅ 正しくブロック")
@@ -150,13 +178,11 @@ async def test_performance_and_stats():
     ] * 20  # 100回のテスト
     
     print("\n4. 大量検証テスト:")
-    start_time = asyncio.get_event_loop().time()
+    start_ns = perf_counter_ns()
     
-    for expr in test_expressions:
-        gate.validate_llm_output(expr, "perf-test")
+    gate.validate_batch(test_expressions, "perf-test")
     
-    end_time = asyncio.get_event_loop().time()
-    processing_time = end_time - start_time
+    processing_time = (perf_counter_ns() - start_ns) / 1e9
     
     stats = gate.get_stats()
     print(f"  処理時間: {processing_time:.3f}秒")
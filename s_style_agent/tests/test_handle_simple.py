@@ -6,12 +6,17 @@ handle構文シンプルテスト
 from s_style_agent.core.evaluator import ContextualEvaluator, Environment
 from s_style_agent.core.parser import parse_s_expression
 
+# 評価器はテスト間で再利用し、環境は各テストの開始時にリセットする
+_EVALUATOR = ContextualEvaluator()
+_ENV = Environment()
+
 def test_simple_handle():
     """シンプルなhandle構文テスト"""
     print("=== handle構文シンプルテスト ===")
     
-    evaluator = ContextualEvaluator()
-    env = Environment()
+    evaluator = _EVALUATOR
+    env = _ENV
+    env.reset()
     
     # 1. 成功例
     print("\n1. 正常ケース:")
@@ -7,22 +7,22 @@
 
 import asyncio
 import sys
-from pathlib import Path
-
-# プロジェクトルートをpythonpathに追加
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
 
 from s_style_agent.core.parser import parse_s_expression
 from s_style_agent.core.evaluator import ContextualEvaluator, Environment
 
+# 評価器はテスト間で再利用し、環境は各テストの開始時にリセットする
+_EVALUATOR = ContextualEvaluator()
+_ENV = Environment()
+
 
 async def test_direct_math_operations():
     """数学エンジンの直接テスト"""
     print("🧮 === 数学エンジン直接テスト ===")
     
-    evaluator = ContextualEvaluator()
-    env = Environment()
+    evaluator = _EVALUATOR
+    env = _ENV
+    env.reset()
     
     test_cases = [
         ('因数分解', '(math "x**2 + 6*x + 9" "factor")'),
@@ -4,8 +4,20 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson 未インストール時は標準 json
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 def test_local_llm():
     base_url = "http://localhost:1234/v1"  # GitHub公開用にlocalhost表記に変更
     model_name = "openai/gpt-oss-20b"
@@ -16,14 +28,19 @@ def test_local_llm():
         f"{base_url}/chat/completions"
     ]
     
+    # 3回のリクエストで同じ接続を再利用する
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    session.mount("http://localhost", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    
     print("=== ローカルLLMサーバー動作テスト ===")
     
     # 1. モデル一覧の取得テスト
     print("\n1. モデル一覧の取得テスト")
     try:
-        response = requests.get(f"{base_url}/models", timeout=60)
+        response = session.get(f"{base_url}/models", timeout=60)
         if response.status_code == 200:
-            models = response.json()
+            models = _json_loads(response.content)
             print("✓ モデル一覧取得成功")
             print(f"利用可能モデル: {json.dumps(models, indent=2, ensure_ascii=False)}")
         else:
@@ -35,10 +52,6 @@ def test_local_llm():
     # 2. チャット完了APIのテスト
     print("\n2. チャット完了APIのテスト")
     try:
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "model": model_name,
             "messages": [
@@ -51,15 +64,14 @@ def test_local_llm():
             "max_tokens": 100
         }
         
-        response = requests.post(
+        response = session.post(
             f"{base_url}/chat/completions", 
-            headers=headers,
-            json=payload,
+            data=_json_dumps(payload),
             timeout=60
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json_loads(response.content)
             print("✓ チャット完了API成功")
             print(f"応答: {result['choices'][0]['message']['content']}")
         else:
@@ -96,15 +108,14 @@ S式のみを返してください。"""
             "max_tokens": 200
         }
         
-        response = requests.post(
+        response = session.post(
             f"{base_url}/chat/completions", 
-            headers=headers,
-            json=payload,
+            data=_json_dumps(payload),
             timeout=60
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json_loads(response.content)
             s_expression = result['choices'][0]['message']['content'].strip()
             print("✓ S式生成成功")
             print(f"生成されたS式: {s_expression}")
@@ -113,6 +124,8 @@ S式のみを返してください。"""
             
     except Exception as e:
         print(f"✗ S式生成エラー: {e}")
+    
+    session.close()
 
 if __name__ == "__main__":
     test_local_llm()
\ No newline at end of file
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+MathEngine.execute_batch と SymEngine 経路のテスト
+"""
+
+import asyncio
+
+from s_style_agent.tools import math_engine
+from s_style_agent.tools.math_engine import MathEngine
+
+
+class TestMathEngineBatch:
+    """プロセスプールでの一括実行のテスト"""
+
+    def test_batch_results_keep_input_order(self):
+        """結果は入力順で、エンジン間でプールを共有し、停止後は作り直す"""
+        queries = [
+            {"expression": "x**2", "operation": "diff"},
+            {"expression": "(x + 1)**2", "operation": "expand"},
+            {"expression": "x", "operation": "unknown"},
+        ]
+        try:
+            results = asyncio.run(MathEngine().execute_batch(queries))
+            pool = math_engine._math_pool
+            asyncio.run(MathEngine().execute_batch(queries[:2]))
+
+            assert [result.result for result in results[:2]] == ["2*x", "x**2 + 2*x + 1"]
+            assert not results[2].success
+            assert math_engine._math_pool is pool
+        finally:
+            math_engine._shutdown_math_pool()
+
+        assert math_engine._math_pool is None
+
+
+class TestSymEngineExpand:
+    """SymEngine の有無で expand の結果が変わらないことのテスト"""
+
+    def test_expand_matches_sympy_with_and_without_symengine(self, monkeypatch):
+        """非多項式を含む式でも SymPy の expand と同じ結果になる"""
+        import sympy as sp
+        x, y = sp.symbols("x y")
+        exprs = [sp.exp(x + y), (x + 1)**2 * sp.exp(x + y), (x + 1)**sp.Rational(3, 2), (x + y)**2 * (x - 1)]
+
+        with_symengine = [math_engine._op_expand(expr, x, {}) for expr in exprs]
+        monkeypatch.setattr(math_engine, "se", None)
+        without_symengine = [math_engine._op_expand(expr, x, {}) for expr in exprs]
+
+        assert with_symengine == without_symengine == [sp.expand(expr) for expr in exprs]
@@ -6,16 +6,36 @@ SymPyを使った複雑な数学計算のテストケース
 """
 
 import asyncio
+import functools
+import logging
+import os
 import sys
-from pathlib import Path
-
-# プロジェクトルートをpythonpathに追加
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+from dataclasses import dataclass
+from typing import Any, Tuple
 
 from s_style_agent.tools.builtin_tools import register_builtin_tools
 from s_style_agent.core.parser import parse_s_expression
 from s_style_agent.core.evaluator import ContextualEvaluator, Environment
+from s_style_agent.tests.utils import run_async
+
+# 詳細出力はログ経由（TEST_LOG=INFO で表示、既定は失敗のみ）
+log = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_evaluator() -> Tuple[ContextualEvaluator, Environment]:
+    """評価器・環境を初回利用時に1つだけ構築（import 時には LLM クライアントを作らない）"""
+    return ContextualEvaluator(), Environment()
+
+
+@dataclass(slots=True, frozen=True)
+class MathCase:
+    """math ツールのテストケース（追加引数は (名前, 値) のタプル）"""
+    name: str
+    expr: str
+    op: str
+    var: str = "x"
+    options: Tuple[Tuple[str, Any], ...] = ()
 
 
 class AdvancedMathTestSuite:
@@ -23,17 +43,19 @@ class AdvancedMathTestSuite:
     
     def __init__(self):
         self.registry = register_builtin_tools()
-        self.evaluator = ContextualEvaluator()
-        self.env = Environment()
+        self.evaluator, self.env = _shared_evaluator()
         self.passed = 0
         self.failed = 0
     
     async def run_test(self, name: str, expression: str, operation: str, var: str = "x", **kwargs):
-        """単一テストの実行"""
-        print(f"\n📊 {name}")
-        print(f"   式: {expression}")
-        print(f"   操作: {operation}({', '.join(f'{k}={v}' for k, v in kwargs.items())})")
+        """単一テストの実行（並行実行時に出力が混ざらないよう、まとめて表示）"""
+        lines = [
+            f"\n📊 {name}",
+            f"   式: {expression}",
+            f"   操作: {operation}({', '.join(f'{k}={v}' for k, v in kwargs.items())})",
+        ]
         
+        ok = False
         try:
             result = await self.registry.execute_tool(
                 "math", 
@@ -44,63 +66,61 @@ class AdvancedMathTestSuite:
             )
             
             if result.success:
-                print(f"   ✅ 結果: {result.result}")
+                lines.append(f"   ✅ 結果: {result.result}")
                 self.passed += 1
-                return True
+                ok = True
             else:
-                print(f"   ❌ エラー: {result.error}")
+                lines.append(f"   ❌ エラー: {result.error}")
                 self.failed += 1
-                return False
                 
         except Exception as e:
-            print(f"   ❌ 例外: {e}")
+            lines.append(f"   ❌ 例外: {e}")
             self.failed += 1
-            return False
+        
+        log.log(logging.INFO if ok else logging.WARNING, "\n".join(lines))
+        return ok
     
     async def test_basic_operations(self):
         """基本演算テスト"""
-        print("\n🧮 === 基本演算テスト ===")
+        log.info("\n🧮 === 基本演算テスト ===")
         
         tests = [
-            ("因数分解", "x**2 + 5*x + 6", "factor"),
-            ("展開", "(x + 1)**2", "expand"),
-            ("簡約", "sin(x)**2 + cos(x)**2", "simplify"),
-            ("微分", "x**3 + 2*x**2", "diff"),
-            ("積分", "2*x + 3", "integrate"),
-            ("定積分", "x**2", "integrate", "x", {"lower": 0, "upper": 1}),
+            MathCase("因数分解", "x**2 + 5*x + 6", "factor"),
+            MathCase("展開", "(x + 1)**2", "expand"),
+            MathCase("簡約", "sin(x)**2 + cos(x)**2", "simplify"),
+            MathCase("微分", "x**3 + 2*x**2", "diff"),
+            MathCase("積分", "2*x + 3", "integrate"),
+            MathCase("定積分", "x**2", "integrate", "x", (("lower", 0), ("upper", 1))),
         ]
         
-        for test_data in tests:
-            if len(test_data) == 3:
-                name, expr, op = test_data
-                await self.run_test(name, expr, op)
-            elif len(test_data) == 4:
-                name, expr, op, var = test_data
-                await self.run_test(name, expr, op, var)
-            elif len(test_data) == 5:
-                name, expr, op, var, kwargs = test_data
-                await self.run_test(name, expr, op, var, **kwargs)
+        # 各テストは独立しているため並行実行
+        await asyncio.gather(*(
+            self.run_test(case.name, case.expr, case.op, case.var, **dict(case.options))
+            for case in tests
+        ))
     
     async def test_advanced_operations(self):
         """高度演算テスト"""
-        print("\n🚀 === 高度演算テスト ===")
+        log.info("\n🚀 === 高度演算テスト ===")
         
-        # 極限テスト
-        await self.run_test("極限 x→0", "sin(x)/x", "limit", point="0")
-        await self.run_test("極限 x→∞", "(x**2 + 1)/(x**2 + 2)", "limit", point="oo")
-        
-        # テイラー展開
-        await self.run_test("テイラー展開", "exp(x)", "series", point="0", n=5)
-        
-        # 方程式
-        await self.run_test("方程式求解", "x**2 + 3*x + 2", "solve")
-        
-        # 部分分数
-        await self.run_test("部分分数", "1/(x**2 - 1)", "partial_fractions")
+        await asyncio.gather(
+            # 極限テスト
+            self.run_test("極限 x→0", "sin(x)/x", "limit", point="0"),
+            self.run_test("極限 x→∞", "(x**2 + 1)/(x**2 + 2)", "limit", point="oo"),
+            
+            # テイラー展開
+            self.run_test("テイラー展開", "exp(x)", "series", point="0", n=5),
+            
+            # 方程式
+            self.run_test("方程式求解", "x**2 + 3*x + 2", "solve"),
+            
+            # 部分分数
+            self.run_test("部分分数", "1/(x**2 - 1)", "partial_fractions"),
+        )
     
     def test_s_expressions(self):
         """S式統合テスト（同期版）"""
-        print("\n🔗 === S式統合テスト ===")
+        log.info("\n🔗 === S式統合テスト ===")
         
         s_expressions = [
             '(math "x**2 + 4*x + 4" "factor")',
@@ -109,20 +129,21 @@ class AdvancedMathTestSuite:
             '(math "x**2 - 1" "factor")',
         ]
         
+        # 数件の小さな式なのでプロセス起動より安いプロセス内で評価（環境はS式ごとにリセット）
         for i, s_expr in enumerate(s_expressions, 1):
-            print(f"\n🔗 S式テスト {i}: {s_expr}")
             try:
                 parsed = parse_s_expression(s_expr)
+                self.env.reset()
                 result = self.evaluator.evaluate_with_context(parsed, self.env)
-                print(f"   ✅ 結果: {result}")
+                log.info("\n🔗 S式テスト %d: %s\n   ✅ 結果: %s", i, s_expr, result)
                 self.passed += 1
             except Exception as e:
-                print(f"   ❌ エラー: {e}")
+                log.warning("\n🔗 S式テスト %d: %s\n   ❌ エラー: %s", i, s_expr, e)
                 self.failed += 1
     
     async def test_error_cases(self):
         """エラーケーステスト"""
-        print("\n⚠️ === エラーケーステスト ===")
+        log.info("\n⚠️ === エラーケーステスト ===")
         
         # 無効な操作
         await self.run_test("無効な操作", "x**2", "invalid_op")
@@ -135,21 +156,20 @@ class AdvancedMathTestSuite:
     
     async def run_all_tests(self):
         """全テストの実行"""
-        print("🧪 高度数学処理テストスイート開始（修正版）")
-        print("=" * 60)
+        log.info("🧪 高度数学処理テストスイート開始（修正版）\n%s", "=" * 60)
         
         await self.test_basic_operations()
         await self.test_advanced_operations()
         self.test_s_expressions()  # 同期版
         await self.test_error_cases()
         
-        print("\n" + "=" * 60)
-        print(f"📊 テスト完了: ✅{self.passed}件成功 ❌{self.failed}件失敗")
-        
+        # 結果サマリーは常に表示（1回の書き込みでまとめて出力）
+        summary = ["", "=" * 60, f"📊 テスト完了: ✅{self.passed}件成功 ❌{self.failed}件失敗"]
         if self.failed == 0:
-            print("🎉 全テスト合格！")
+            summary.append("🎉 全テスト合格！")
         else:
-            print(f"⚠️ {self.failed}件のテストが失敗しました")
+            summary.append(f"⚠️ {self.failed}件のテストが失敗しました")
+        sys.stdout.write("\n".join(summary) + "\n")
         
         return self.failed == 0
 
@@ -166,4 +186,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    logging.basicConfig(level=os.environ.get("TEST_LOG", "WARNING"), stream=sys.stdout, format="%(message)s")
+    run_async(main())
\ No newline at end of file
@@ -7,10 +7,13 @@ MCPサーバーの起動、ツール発見、S式統合をテスト
 
 import asyncio
 import os
+import pytest
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.mcp.config import mcp_config_loader
 from s_style_agent.tools.base import global_registry
 
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_mcp_config():
     """MCP設定読み込みテスト"""
@@ -3,15 +3,15 @@
 MCP統合の最終テスト - S式からMCPツールの呼び出し
 """
 import asyncio
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
 from s_style_agent.core.async_evaluator import evaluate_s_expression_async
 
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_mcp_s_expression_integration():
     """MCP統合のS式テスト"""
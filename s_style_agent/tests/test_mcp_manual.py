@@ -2,14 +2,12 @@
 """
 MCP統合の手動テスト
 """
-import asyncio
-import sys
-import os
-
-# プロジェクトパスを追加
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
+from s_style_agent.tests.utils import run_async
+
+pytestmark = pytest.mark.mcp_network
 
 
 async def test_mcp_integration():
@@ -86,4 +84,4 @@ async def test_mcp_integration():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_mcp_integration())
\ No newline at end of file
+    run_async(test_mcp_integration())
\ No newline at end of file
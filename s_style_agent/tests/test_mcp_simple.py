@@ -3,10 +3,6 @@
 MCP統合の簡単なテスト
 """
 import asyncio
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath('.'))
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+S式パーサーのキャッシュのテスト
+"""
+
+import pytest
+
+from s_style_agent.core import parser
+from s_style_agent.core.parser import SExpressionParseError, parse_s_expression
+
+
+class TestParseErrorCache:
+    """解析エラーのキャッシュのテスト"""
+
+    def test_repeated_invalid_input_skips_tokenize(self, monkeypatch):
+        """同じ不正な文字列は再トークン化せず、同じメッセージで失敗する"""
+        calls = []
+        tokenize = parser.tokenize_s_expression
+        monkeypatch.setattr(parser, "tokenize_s_expression", lambda text: calls.append(text) or tokenize(text))
+        monkeypatch.setattr(parser, "_PARSE_ERRORS", {})
+        bad_output = "(calc \"1+1\" (notify"
+
+        with pytest.raises(SExpressionParseError) as first:
+            parse_s_expression(bad_output)
+        with pytest.raises(SExpressionParseError) as second:
+            parse_s_expression(bad_output)
+
+        assert str(second.value) == str(first.value)
+        assert calls == [bad_output]
+
+    def test_error_cache_is_bounded(self, monkeypatch):
+        """上限に達したらエラーキャッシュを空にしてから追加する"""
+        monkeypatch.setattr(parser, "_PARSE_ERRORS", {})
+        monkeypatch.setattr(parser, "_PARSE_ERRORS_LIMIT", 2)
+
+        for index in range(3):
+            with pytest.raises(SExpressionParseError):
+                parse_s_expression(f"(bad {index}")
+
+        assert list(parser._PARSE_ERRORS) == ["(bad 2"]
+
+    def test_unhashable_input_is_parse_error(self):
+        """ハッシュ不可能な入力はキャッシュせずパースエラーにする"""
+        with pytest.raises(SExpressionParseError):
+            parse_s_expression(["calc"])
@@ -0,0 +1,55 @@
+"""
+AgentService パフォーマンスベンチマーク
+
+pytest-benchmark によるベースライン計測（未インストール時はスキップ）
+
+    uv run python -m pytest s_style_agent/tests/test_perf_agent.py --benchmark-only
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from ..core.agent_service import AgentService
+
+
+@pytest.fixture(scope="module")
+def agent_service():
+    """ベンチマーク用 AgentService（構築コストは計測対象外）"""
+    return AgentService(
+        llm_base_url="http://test:1234/v1",
+        model_name="test-model",
+        use_async=True
+    )
+
+
+@pytest.mark.benchmark
+def test_evaluate_s_expression_bench(benchmark, agent_service):
+    """S式評価のベンチマーク"""
+    result = benchmark.pedantic(
+        lambda: asyncio.run(agent_service.evaluate_s_expression("(calc \"2+2\")")),
+        rounds=50,
+        warmup_rounds=5
+    )
+
+    assert result == 4
+
+
+@pytest.mark.benchmark
+def test_generate_s_expression_bench(benchmark, agent_service, monkeypatch):
+    """S式生成のベンチマーク（LLM呼び出しはスタブ化）"""
+    async def fake_ainvoke(messages):
+        return SimpleNamespace(content="(calc \"2+2\")")
+
+    monkeypatch.setattr(agent_service, "llm", SimpleNamespace(ainvoke=fake_ainvoke))
+
+    result = benchmark.pedantic(
+        lambda: asyncio.run(agent_service.generate_s_expression("calculate 2 plus 2")),
+        rounds=50,
+        warmup_rounds=5
+    )
+
+    assert result == "(calc \"2+2\")"
@@ -2,13 +2,12 @@
 """
 堅牢なMCPクライアントのテスト
 """
-import asyncio
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.robust_client import robust_mcp_client
+from s_style_agent.tests.utils import run_async
+
+pytestmark = pytest.mark.mcp_network
 
 
 async def test_robust_mcp():
@@ -63,4 +62,4 @@ async def test_robust_mcp():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_robust_mcp())
\ No newline at end of file
+    run_async(test_robust_mcp())
\ No newline at end of file
@@ -3,10 +3,6 @@
 サンプルデータでの検索結果抽出テスト
 """
 import asyncio
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath('.'))
 
 from s_style_agent.tools.search_result_extractor import search_extractor
 
@@ -22,9 +18,11 @@ async def test_sample_extraction():
         
         print("1. 検索結果抽出実行中...")
         query = "高松市役所 座標"
+        query2 = "高松市役所 電話番号"
         
-        # 抽出実行
-        extracted = search_extractor.extract_information(query, sample_result)
+        # 抽出実行（2つのクエリを1回の解析でまとめて処理）
+        extracted_by_query = search_extractor.extract_information_batch([query, query2], sample_result)
+        extracted = extracted_by_query[query]
         
         print(f"\n2. 元の検索クエリ: {query}")
         print(f"元のデータサイズ: {len(str(sample_result))} 文字")
@@ -65,8 +63,7 @@ async def test_sample_extraction():
         
         # 別のクエリでもテスト
         print("\n6. 別のクエリでのテスト...")
-        query2 = "高松市役所 電話番号"
-        extracted2 = search_extractor.extract_information(query2, sample_result)
+        extracted2 = extracted_by_query[query2]
         
         print(f"クエリ: {query2}")
         print("抽出結果:")
@@ -4,29 +4,66 @@ AST Schema + ゲート検証テスト
 """
 
 import os
+import sys
 from s_style_agent.core.schema_validator import SExpressionValidator, LLMOutputGate
-from s_style_agent.core.parser import parse_s_expression
+from s_style_agent.core.parser import parse_s_expression, freeze_s_expression
 
 # LangSmith設定
 os.environ['LANGSMITH_PROJECT'] = 's-style-agent'
 os.environ['LANGSMITH_TRACING'] = 'true'
 
+# strict バリデータはスキーマ・ルールの構築済みインスタンスをテスト間で共有
+_VALIDATOR = SExpressionValidator(validation_level="strict")
+
+# テスト用S式コーパス（インポート時に一度だけ構築）
+# 正常なS式
+_VALID_EXPRESSIONS = (
+    ["notify", "Hello World"],
+    ["seq", ["notify", "Step 1"], ["notify", "Step 2"]],
+    ["while", ["<", "x", 10], ["set", "x", ["+", "x", 1]], 5],
+    ["handle", "err", ["calc", "1+1"], ["notify", "Error occurred"]],
+)
+
+# セキュリティ違反S式
+_MALICIOUS_EXPRESSIONS = (
+    ["__import__", "os"],
+    ["eval", "malicious_code"],
+    ["exec", "dangerous_code"],
+    # 深すぎるネスト（テスト用に小さく設定）
+    ["seq"] + [["notify", sys.intern(f"deep_{i}")] for i in range(25)],  # 深度制限テスト
+)
+
+# LLM出力シミュレーション
+_LLM_OUTPUTS = (
+    '(notify "Hello from LLM")',
+    '(seq (notify "Starting task") (calc "2+2"))',
+    '(handle err (calc "invalid") (notify "Error caught"))',
+    '(while (< counter 3) (set counter (+ counter 1)) 5)',
+    # 無効な出力
+    '(eval "dangerous code")',
+    'invalid s-expression syntax',
+    '(unknown_operation "test")'
+)
+
+# エッジケース
+_EDGE_CASES = (
+    [],  # 空リスト
+    [""],  # 空文字列演算子
+    ["notify"],  # 引数不足
+    ["if", True, "then", "else", "extra"],  # 引数過多
+    ["set", 123, "value"],  # 変数名が数値
+    ["while", True, "body", -1],  # 負の最大反復数
+)
+
 def test_schema_validation():
     """スキーマ検証のテスト"""
     print("=== スキーマ検証テスト ===")
     
-    validator = SExpressionValidator(validation_level="strict")
+    validator = _VALIDATOR
     
     # 1. 正常なS式
     print("\n1. 正常なS式:")
-    valid_expressions = [
-        ["notify", "Hello World"],
-        ["seq", ["notify", "Step 1"], ["notify", "Step 2"]],
-        ["while", ["<", "x", 10], ["set", "x", ["+", "x", 1]], 5],
-        ["handle", "err", ["calc", "1+1"], ["notify", "Error occurred"]]
-    ]
-    
-    for expr in valid_expressions:
+    for expr in _VALID_EXPRESSIONS:
         is_valid, errors = validator.validate(expr, source="test", llm_model="test-model")
         status = "✅ 通過" if is_valid else "❌ 失敗"
         print(f"  {expr} → {status}")
@@ -38,19 +75,11 @@ def test_security_checks():
     """セキュリティチェックのテスト"""
     print("\n=== セキュリティチェックテスト ===")
     
-    validator = SExpressionValidator(validation_level="strict")
+    validator = _VALIDATOR
     
     # 2. セキュリティ違反S式
     print("\n2. セキュリティ違反S式:")
-    malicious_expressions = [
-        ["__import__", "os"],
-        ["eval", "malicious_code"],
-        ["exec", "dangerous_code"],
-        # 深すぎるネスト（テスト用に小さく設定）
-        ["seq"] + [["notify", f"deep_{i}"] for i in range(25)]  # 深度制限テスト
-    ]
-    
-    for expr in malicious_expressions:
+    for expr in _MALICIOUS_EXPRESSIONS:
         is_valid, errors = validator.validate(expr, source="malicious", llm_model="test-model")
         status = "✅ 正しく拒否" if not is_valid else "❌ 通過してしまった"
         print(f"  {str(expr)[:60]}... → {status}")
@@ -66,18 +95,7 @@ def test_llm_output_gate():
     
     # 3. LLM出力シミュレーション
     print("\n3. LLM出力シミュレーション:")
-    llm_outputs = [
-        '(notify "Hello from LLM")',
-        '(seq (notify "Starting task") (calc "2+2"))',
-        '(handle err (calc "invalid") (notify "Error caught"))',
-        '(while (< counter 3) (set counter (+ counter 1)) 5)',
-        # 無効な出力
-        '(eval "dangerous code")',
-        'invalid s-expression syntax',
-        '(unknown_operation "test")'
-    ]
-    
-    for output in llm_outputs:
+    for output in _LLM_OUTPUTS:
         is_approved, parsed_expr, errors = gate.validate_llm_output(output, "test-llm")
         status = "✅ 承認" if is_approved else "❌ 拒否"
         print(f"  '{output}' → {status}")
@@ -97,7 +115,7 @@ def test_validation_levels():
     
     print("\n4. 検証レベル別テスト:")
     for level in ["strict", "permissive", "experimental"]:
-        validator = SExpressionValidator(validation_level=level)
+        validator = _VALIDATOR if level == "strict" else SExpressionValidator(validation_level=level)
         is_valid, errors = validator.validate(experimental_expr, source="test", llm_model="test")
         status = "✅ 通過" if is_valid else "❌ 拒否"
         print(f"  {level}モード: {experimental_expr} → {status}")
@@ -109,20 +127,11 @@ def test_edge_cases():
     """エッジケースのテスト"""
     print("\n=== エッジケーステスト ===")
     
-    validator = SExpressionValidator(validation_level="strict")
+    validator = _VALIDATOR
     
     # 5. エッジケース
     print("\n5. エッジケース:")
-    edge_cases = [
-        [],  # 空リスト
-        [""],  # 空文字列演算子
-        ["notify"],  # 引数不足
-        ["if", True, "then", "else", "extra"],  # 引数過多
-        ["set", 123, "value"],  # 変数名が数値
-        ["while", True, "body", -1],  # 負の最大反復数
-    ]
-    
-    for expr in edge_cases:
+    for expr in _EDGE_CASES:
         is_valid, errors = validator.validate(expr, source="edge_test", llm_model="test")
         status = "✅ 通過" if is_valid else "❌ 拒否"
         print(f"  {expr} → {status}")
@@ -130,6 +139,44 @@ def test_edge_cases():
             for error in errors[:1]:  # 最初のエラーのみ表示
                 print(f"    エラー: {error}")
 
+def test_cached_validation():
+    """同一構造のS式の検証結果再利用テスト"""
+    print("\n=== 検証キャッシュテスト ===")
+    
+    validator = _VALIDATOR
+    
+    # 構造的に同一なS式は同じオブジェクトに hash-consing される（型は区別）
+    assert freeze_s_expression(["calc", 1]) is freeze_s_expression(["calc", 1])
+    assert freeze_s_expression(["calc", 1]) is not freeze_s_expression(["calc", 1.0])
+    
+    expr = parse_s_expression('(seq (notify "a") (eval "x"))')
+    first = validator.validate(expr, source="test", llm_model="test")
+    second = validator.validate(parse_s_expression('(seq (notify "a") (eval "x"))'), source="test", llm_model="test")
+    assert first == second
+    assert first[0] is False
+    
+    # 返されたエラーリストを変更してもキャッシュに影響しない
+    second[1].clear()
+    assert validator.validate(expr)[1] == first[1]
+    print("  ✅ 検証結果を再利用")
+
+def test_gate_cache_returns_fresh_expressions():
+    """ゲートのキャッシュヒット時も呼び出し側が変更できる新しいS式を返すテスト"""
+    gate = LLMOutputGate(validation_level="strict")
+    output = '(seq (notify "a") (calc "1+1"))'
+    
+    is_approved, parsed_expr, _ = gate.validate_llm_output(output, "test-llm")
+    assert is_approved
+    parsed_expr[1].append("mutated")
+    
+    _, cached_expr, _ = gate.validate_llm_output(output, "test-llm")
+    assert cached_expr == ["seq", ["notify", "a"], ["calc", "1+1"]]
+    
+    (_, batch_expr, _), (_, other_expr, _) = gate.validate_batch([output, output], "test-llm")
+    batch_expr.clear()
+    assert other_expr == cached_expr
+    assert gate.get_stats()["allowed"] == 4
+
 def main():
     """メインテスト実行"""
     print("AST Schema + ゲート検証テスト開始")
@@ -139,6 +186,8 @@ def main():
     test_llm_output_gate()
     test_validation_levels()
     test_edge_cases()
+    test_cached_validation()
+    test_gate_cache_returns_fresh_expressions()
     
     print("\n✅ ゲート検証システムテスト完了！")
     print("📊 LangSmithで詳細なトレースを確認: https://smith.langchain.com/")
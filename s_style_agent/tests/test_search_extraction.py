@@ -3,15 +3,16 @@
 検索結果抽出機能のテスト
 """
 import asyncio
-import sys
 import os
 
-sys.path.insert(0, os.path.abspath('.'))
-
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
 from s_style_agent.tools.search_result_extractor import search_extractor
 
+# サンプル検索結果（ライブ検索をスキップした場合に使用）
+_SAMPLE_RESULT = {
+    'content': [{'type': 'text', 'text': 'Title: 高松市役所（高松市/市役所・区役所・役場）の地図｜地図マピオン\nDescription: 地図マピオンが提供する高松市役所（高松市/市役所・区役所・役場）の詳細地図。<strong>中心点の緯度経度は[34.34275059,134.04663029]、マップコード[60 605 687*61]、標高(海抜)3m</strong>。最寄り駅、バス停、ルート検索、距離測定、天気も...\nURL: https://www.mapion.co.jp/m2/34.34275059,134.04663029,16/poi=ILSP0000000798_ipclm\n\nTitle: 高松市役所（香川県高松市） - Yahoo!くらし\nDescription: <strong>高松市役所</strong> · 公式サイト · 地域一覧 · タカマツシヤクショ · 住所 · 開庁時間 · 電話番号 · 〒760-8571 香川県高松市番町1丁目8-15 · 詳細な地図を見る · 高松琴平電気鉄道瓦町駅 西出口から徒歩約11分 ·\nURL: https://kurashi.yahoo.co.jp/facility/a372010001'}], 'isError': False}
+
 
 async def test_search_extraction():
     """検索結果抽出機能テスト"""
@@ -31,11 +32,9 @@ async def test_search_extraction():
         # 2. 検索結果抽出機能のテスト（レート制限のため1回のみ）
         print("\n2. 検索結果抽出テスト...")
         
-        # ユーザー確認
-        print("実際の検索を1回実行して抽出機能をテストします。")
-        confirm = input("実行しますか？ (y/n): ").strip().lower()
-        
-        if confirm == 'y':
+        # 実検索は環境変数 RUN_LIVE_SEARCH=1 の場合のみ実行（標準入力で停止しない）
+        if os.environ.get("RUN_LIVE_SEARCH") == "1":
+            print("実際の検索を1回実行して抽出機能をテストします。")
             # 検索実行
             s_expr = '(search "高松市役所 座標")'
             print(f"検索S式: {s_expr}")
@@ -62,8 +61,7 @@ async def test_search_extraction():
             # 代わりにサンプルデータでテスト
             print("\n3. サンプルデータでの抽出テスト...")
             
-            sample_result = {
-                'content': [{'type': 'text', 'text': 'Title: 高松市役所（高松市/市役所・区役所・役場）の地図｜地図マピオン\nDescription: 地図マピオンが提供する高松市役所（高松市/市役所・区役所・役場）の詳細地図。<strong>中心点の緯度経度は[34.34275059,134.04663029]、マップコード[60 605 687*61]、標高(海抜)3m</strong>。最寄り駅、バス停、ルート検索、距離測定、天気も...\nURL: https://www.mapion.co.jp/m2/34.34275059,134.04663029,16/poi=ILSP0000000798_ipclm\n\nTitle: 高松市役所（香川県高松市） - Yahoo!くらし\nDescription: <strong>高松市役所</strong> · 公式サイト · 地域一覧 · タカマツシヤクショ · 住所 · 開庁時間 · 電話番号 · 〒760-8571 香川県高松市番町1丁目8-15 · 詳細な地図を見る · 高松琴平電気鉄道瓦町駅 西出口から徒歩約11分 ·\nURL: https://kurashi.yahoo.co.jp/facility/a372010001'}], 'isError': False}
+            sample_result = _SAMPLE_RESULT
             
             extracted = search_extractor.extract_information("高松市役所 座標", sample_result)
             
@@ -3,15 +3,15 @@
 動的MCP検索統合のテスト
 """
 import asyncio
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
 from s_style_agent.core.async_evaluator import evaluate_s_expression_async
 
+pytestmark = pytest.mark.mcp_network
+
 
 async def test_dynamic_search_integration():
     """動的検索統合テスト"""
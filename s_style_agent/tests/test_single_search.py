@@ -2,14 +2,13 @@
 """
 単一検索テスト（レート制限注意）
 """
-import asyncio
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath('.'))
+import pytest
 
 from s_style_agent.mcp.manager import mcp_manager
 from s_style_agent.core.evaluator import evaluate_s_expression
+from s_style_agent.tests.utils import run_async
+
+pytestmark = pytest.mark.mcp_network
 
 
 async def test_single_search():
@@ -60,4 +59,4 @@ async def test_single_search():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_single_search())
\ No newline at end of file
+    run_async(test_single_search())
\ No newline at end of file
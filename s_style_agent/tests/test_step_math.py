@@ -5,11 +5,6 @@
 
 import asyncio
 import sys
-from pathlib import Path
-
-# プロジェクトルートをpythonpathに追加
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
 
 from s_style_agent.tools.math_engine import StepMathEngine
 from s_style_agent.tools.builtin_tools import register_builtin_tools
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+TraceEntry の JSON-L 出力のテスト
+"""
+
+import json
+
+from s_style_agent.core.trace_logger import ExecutionMetadata, TraceEntry
+
+
+class TestTraceEntryJson:
+    """JSON-L 出力のテスト"""
+
+    def test_wide_integer_output_is_serialized(self):
+        """64ビットを超える整数の結果も標準 json と同じ内容で出力する"""
+        entry = TraceEntry(
+            timestamp="2024-01-01T00:00:00",
+            operation="calc",
+            path=[0],
+            input='(calc "2**100")',
+            output=2**100,
+            duration_ms=0.5,
+            explanation="計算",
+            metadata=ExecutionMetadata(),
+        )
+
+        data = json.loads(entry.to_json_bytes())
+
+        assert data["output"] == 2**100
+        assert data == json.loads(entry.to_json_line())
@@ -132,17 +132,24 @@ def test_real_world_scenarios():
     print(f"結果: {result}")
     print(f"最終状態 - retry_count: {env.lookup('retry_count')}, success: {env.lookup('success')}")
 
-def main():
-    """メインテスト実行"""
-    print("while構文制限・エラーケーステスト開始")
-    
+def _run_sync_tests():
+    """同期テストを順に実行（グローバルなトレースロガーを共有するため同じスレッドで直列に）"""
     test_max_iterations_limit()
     test_error_cases()
-    asyncio.run(test_async_while_limits())
     test_real_world_scenarios()
+
+async def main():
+    """メインテスト実行"""
+    print("while構文制限・エラーケーステスト開始")
+    
+    # 同期テストはワーカースレッドで、非同期テストはイベントループ上で並行実行
+    await asyncio.gather(
+        asyncio.to_thread(_run_sync_tests),
+        test_async_while_limits(),
+    )
     
     print("\n✅ while構文制限・エラーケーステスト完了！")
     print("📊 LangSmithで詳細なトレースを確認: https://smith.langchain.com/")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
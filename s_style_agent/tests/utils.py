@@ -0,0 +1,18 @@
+"""
+テストスクリプト共通のユーティリティ
+"""
+
+import asyncio
+from typing import Any, Coroutine
+
+try:
+    import uvloop
+except ImportError:  # uvloop 未インストール時は標準のイベントループを使用
+    uvloop = None
+
+
+def run_async(main: Coroutine[Any, Any, Any]) -> Any:
+    """手動実行用のエントリポイント（uvloop があればそのイベントループで実行）"""
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(main)
@@ -4,13 +4,27 @@
 将来的なMCP統合を念頭に置いたツールアーキテクチャ
 """
 
+import os
+import traceback
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Union
 from langsmith import traceable
-from pydantic import BaseModel, Field
 
+# LangSmith のトレースを有効にする環境変数（いずれかが "true" なら有効）
+_TRACING_ENV_VARS = ("LANGSMITH_TRACING_V2", "LANGCHAIN_TRACING_V2", "LANGSMITH_TRACING", "LANGCHAIN_TRACING")
 
-class ToolParameter(BaseModel):
+if not any(os.environ.get(var, "").lower() == "true" for var in _TRACING_ENV_VARS):
+    def traceable(*args, **kwargs):
+        """トレース無効時の no-op デコレータ（ツール実行ごとのラッパー処理を省く）"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@dataclass(slots=True, frozen=True)
+class ToolParameter:
     """ツールパラメータの定義"""
     name: str
     type: str
@@ -19,19 +33,21 @@ class ToolParameter(BaseModel):
     default: Optional[Any] = None
 
 
-class ToolSchema(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ToolSchema:
     """ツールスキーマ - MCP準拠"""
     name: str
     description: str
     parameters: List[ToolParameter]
 
 
-class ToolResult(BaseModel):
-    """ツール実行結果"""
+@dataclass(slots=True, frozen=True)
+class ToolResult:
+    """ツール実行結果（実行ごとに生成されるため、検証なしの軽量なデータクラス）"""
     success: bool
     result: Any
     error: Optional[str] = None
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 
 class BaseTool(ABC):
@@ -62,15 +78,46 @@ class BaseTool(ABC):
         return True
 
 
+# 定型的な失敗結果はエラーメッセージごとに1つだけ生成して共有（呼び出し側は変更しない前提）
+_FAILURE_RESULTS: Dict[str, ToolResult] = {}
+_FAILURE_RESULTS_LIMIT = 256
+
+
+def _failure_result(error: str) -> ToolResult:
+    """定型エラーの ToolResult を返す（同じメッセージなら同じインスタンス）"""
+    result = _FAILURE_RESULTS.get(error)
+    if result is None:
+        result = ToolResult(success=False, result=None, error=error)
+        if len(_FAILURE_RESULTS) < _FAILURE_RESULTS_LIMIT:
+            _FAILURE_RESULTS[error] = result
+    return result
+
+
 class ToolRegistry:
     """ツールレジストリ - MCP統合時の管理クラス"""
     
+    # デバッグ用: True の場合、ツール実行中の例外のトレースバックを metadata に含める
+    capture_tracebacks: bool = False
+    
     def __init__(self):
-        self._tools: Dict[str, BaseTool] = {}
+        self._tools: Mapping[str, BaseTool] = {}
+        self._frozen = False
     
     def register(self, tool: BaseTool) -> None:
         """ツールを登録"""
-        self._tools[tool.name] = tool
+        if self._frozen:
+            # 凍結後の登録はコピーして差し替え（読み取り中の参照には影響しない）
+            tools = dict(self._tools)
+            tools[tool.name] = tool
+            self._tools = MappingProxyType(tools)
+        else:
+            self._tools[tool.name] = tool
+    
+    def freeze(self) -> None:
+        """登録完了後にツール表を読み取り専用の辞書に固定"""
+        if not self._frozen:
+            self._tools = MappingProxyType(dict(self._tools))
+            self._frozen = True
     
     def get_tool(self, name: str) -> Optional[BaseTool]:
         """ツールを取得"""
@@ -86,28 +133,22 @@ class ToolRegistry:
     
     async def execute_tool(self, name: str, **kwargs) -> ToolResult:
         """ツールを実行"""
-        tool = self.get_tool(name)
+        tool = self._tools.get(name)
         if not tool:
-            return ToolResult(
-                success=False,
-                result=None,
-                error=f"Tool '{name}' not found"
-            )
+            return _failure_result(f"Tool '{name}' not found")
         
         if not tool.validate_parameters(kwargs):
-            return ToolResult(
-                success=False,
-                result=None,
-                error=f"Invalid parameters for tool '{name}'"
-            )
+            return _failure_result(f"Invalid parameters for tool '{name}'")
         
         try:
             return await tool.execute(**kwargs)
         except Exception as e:
+            metadata = {"traceback": traceback.format_exc()} if self.capture_tracebacks else {}
             return ToolResult(
                 success=False,
                 result=None,
-                error=str(e)
+                error=str(e),
+                metadata=metadata
             )
 
 
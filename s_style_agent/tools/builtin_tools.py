@@ -4,12 +4,15 @@
 基本的な機能を提供する組み込みツール群
 """
 
+import ast
 import asyncio
-import requests
-from typing import Any, Dict
-from langsmith import traceable
+import functools
+import math
+import time
+from fractions import Fraction
+from typing import Any, Dict, Optional, Union
 
-from .base import BaseTool, ToolSchema, ToolParameter, ToolResult
+from .base import BaseTool, ToolSchema, ToolParameter, ToolResult, traceable
 from .math_engine import MathEngine, StepMathEngine
 from .user_interaction import AskUserTool, CollectInfoTool, ConditionalAskTool, SuggestAndConfirmTool
 
@@ -38,14 +41,102 @@ class NotifyTool(BaseTool):
     @traceable(name="notify_tool_execute")
     async def execute(self, **kwargs) -> ToolResult:
         message = kwargs.get("message", "")
+        # 評価結果より先に表示されるよう、バッファせずその場で出力
         print(f"[NOTIFY] {message}")
         return ToolResult(
             success=True,
             result=message,
-            metadata={"tool": "notify", "timestamp": asyncio.get_event_loop().time()}
+            metadata={"tool": "notify", "timestamp": time.monotonic()}
         )
 
 
+@functools.lru_cache(maxsize=256)
+def _sympify_calc_expression(expression: str) -> Any:
+    """calc の式を SymPy 式に変換（同じ式文字列の解析結果はキャッシュ）"""
+    import sympy as sp
+    return sp.sympify(expression)
+
+
+# numeric モードで SymPy を通さずに評価できる演算子
+# sp.N と結果が一致するよう、整数の有理数演算で答えが整数になる場合に限る
+# （浮動小数・無理数を含む式は SymPy が独自の精度で評価するため対象外）
+_NUMERIC_BINOPS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+}
+_NUMERIC_MAX_EXPONENT = 1024
+_NUMERIC_MAX_RESULT = 2 ** 53  # float で厳密に表せる整数の範囲
+
+
+def _eval_numeric_node(node: ast.AST) -> Fraction:
+    """整数の有理数演算だけの式を厳密に評価（対象外は ValueError）"""
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return Fraction(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _eval_numeric_node(node.operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp):
+        left = _eval_numeric_node(node.left)
+        right = _eval_numeric_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            # 整数乗のみ（巨大な指数は SymPy 側の処理に任せる）
+            if right.denominator != 1 or abs(right) > _NUMERIC_MAX_EXPONENT:
+                raise ValueError("unsupported exponent")
+            return left ** int(right)
+        operator = _NUMERIC_BINOPS.get(type(node.op))
+        if operator is not None:
+            return operator(left, right)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'sqrt'
+            and len(node.args) == 1 and not node.keywords):
+        # 完全平方の分数のみ（厳密に計算できる場合）
+        value = _eval_numeric_node(node.args[0])
+        if value >= 0:
+            num, den = math.isqrt(value.numerator), math.isqrt(value.denominator)
+            if num * num == value.numerator and den * den == value.denominator:
+                return Fraction(num, den)
+    raise ValueError("unsupported node")
+
+
+@functools.lru_cache(maxsize=1024)
+def _compute_numeric_fast(expression: str) -> Optional[Union[int, float]]:
+    """整数の四則演算・整数乗・完全平方の sqrt だけの式を SymPy なしで評価（対象外なら None）"""
+    try:
+        value = _eval_numeric_node(ast.parse(expression, mode='eval').body)
+    except (SyntaxError, ValueError, ZeroDivisionError, RecursionError, MemoryError):
+        return None
+    if value.denominator != 1 or abs(value) > _NUMERIC_MAX_RESULT:
+        return None
+    # sp.N の結果は float で返り、0 のときだけ整数になる
+    return 0 if value == 0 else float(value.numerator)
+
+
+@functools.lru_cache(maxsize=2048)
+def _compute_calc(expression: str, mode: str) -> Union[int, float, str]:
+    """calc の計算結果（同じ式・モードの結果はキャッシュ、結果は不変な int/float/str）"""
+    if mode == "numeric":
+        # 数値だけの単純な式は SymPy を通さずに計算
+        fast_result = _compute_numeric_fast(expression)
+        if fast_result is not None:
+            return fast_result
+    
+    # 直接SymPyを使用した計算（同じ式の解析結果は再利用）
+    import sympy as sp
+    expr = _sympify_calc_expression(expression)
+    
+    if mode == "numeric":
+        result = sp.N(expr)
+        # 可能であれば数値型に変換
+        if result.is_number:
+            return int(result) if result.is_integer else float(result)
+        return str(result)
+    elif mode == "symbolic":
+        return str(expr)
+    else:  # simplify
+        return str(sp.simplify(expr))
+
+
 class CalcTool(BaseTool):
     """計算ツール"""
     
@@ -71,47 +162,21 @@ class CalcTool(BaseTool):
     async def execute(self, **kwargs) -> ToolResult:
         expression = kwargs.get("expression", "")
         mode = kwargs.get("mode", "numeric")  # numeric, symbolic, simplify
+        if mode not in ("numeric", "symbolic", "simplify"):
+            # 予測可能なエラーは例外を経由せずに返す
+            return ToolResult(
+                success=False,
+                result=None,
+                error=f"計算エラー: 不明なモード: {mode}",
+                metadata={"tool": "calc", "expression": expression, "mode": mode}
+            )
         try:
-            # 直接SymPyを使用した計算
-            import sympy as sp
-            expr = sp.sympify(expression)
-            
-            if mode == "numeric":
-                result = sp.N(expr)
-                # 可能であれば数値型に変換
-                if result.is_number:
-                    if result.is_integer:
-                        return ToolResult(
-                            success=True, 
-                            result=int(result), 
-                            metadata={"tool": "calc", "expression": expression, "mode": mode}
-                        )
-                    else:
-                        return ToolResult(
-                            success=True, 
-                            result=float(result), 
-                            metadata={"tool": "calc", "expression": expression, "mode": mode}
-                        )
-                return ToolResult(
-                    success=True, 
-                    result=str(result), 
-                    metadata={"tool": "calc", "expression": expression, "mode": mode}
-                )
-            elif mode == "symbolic":
-                return ToolResult(
-                    success=True, 
-                    result=str(expr), 
-                    metadata={"tool": "calc", "expression": expression, "mode": mode}
-                )
-            elif mode == "simplify":
-                result = sp.simplify(expr)
-                return ToolResult(
-                    success=True, 
-                    result=str(result), 
-                    metadata={"tool": "calc", "expression": expression, "mode": mode}
-                )
-            else:
-                raise ValueError(f"不明なモード: {mode}")
+            result = _compute_calc(expression, mode)
+            return ToolResult(
+                success=True,
+                result=result,
+                metadata={"tool": "calc", "expression": expression, "mode": mode}
+            )
         except Exception as e:
             return ToolResult(
                 success=False,
@@ -193,8 +258,21 @@ class DbQueryTool(BaseTool):
         )
 
 
+# 組み込みツールを登録済みのレジストリ（2回目以降の呼び出しで再構築しない）
+_registered_registry = None
+
+
 def register_builtin_tools():
-    """組み込みツールをレジストリに登録"""
+    """
+    組み込みツールをレジストリに登録
+    
+    登録は初回呼び出し時のみ行い、以降は同じレジストリを返す。
+    組み込みツールは状態を持たないため、登録後のインスタンスを共有して問題ない。
+    """
+    global _registered_registry
+    if _registered_registry is not None:
+        return _registered_registry
+    
     from .base import global_registry
     
     tools = [
@@ -212,7 +290,9 @@ def register_builtin_tools():
     
     for tool in tools:
         global_registry.register(tool)
+    global_registry.freeze()
     
+    _registered_registry = global_registry
     return global_registry
 
 
@@ -221,16 +301,14 @@ if __name__ == "__main__":
     async def test_tools():
         registry = register_builtin_tools()
         
-        # 通知ツールテスト
-        result = await registry.execute_tool("notify", message="テストメッセージ")
-        print(f"Notify result: {result}")
-        
-        # 計算ツールテスト
-        result = await registry.execute_tool("calc", expression="2 + 3 * 4")
-        print(f"Calc result: {result}")
-        
-        # 検索ツールテスト
-        result = await registry.execute_tool("search", query="langchain")
-        print(f"Search result: {result}")
+        # 通知・計算・検索ツールは互いに独立しているため並行実行
+        notify_result, calc_result, search_result = await asyncio.gather(
+            registry.execute_tool("notify", message="テストメッセージ"),
+            registry.execute_tool("calc", expression="2 + 3 * 4"),
+            registry.execute_tool("search", query="langchain"),
+        )
+        print(f"Notify result: {notify_result}")
+        print(f"Calc result: {calc_result}")
+        print(f"Search result: {search_result}")
     
     asyncio.run(test_tools())
\ No newline at end of file
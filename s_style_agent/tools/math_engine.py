@@ -13,16 +13,118 @@ SymPyライブラリを活用し、記号計算・数値計算・解析的操作
 """
 
 import asyncio
-from typing import Any, Dict, Optional, Union
+import atexit
+import functools
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import sympy as sp
-from sympy import (
-    sympify, symbols, simplify, expand, factor, solve, diff, integrate,
-    limit, series, apart, roots, N
-)
-from langsmith import traceable
+try:
+    import symengine as se
+except ImportError:  # symengine 未インストール時は SymPy のみで計算
+    se = None
 
-from .base import BaseTool, ToolSchema, ToolParameter, ToolResult
+from .base import BaseTool, ToolSchema, ToolParameter, ToolResult, traceable
+
+
+# 危険な式の事前フィルタ（SymPy の解析前に正規表現1回で拒否）
+_DANGEROUS_EXPRESSION_RE = re.compile(r"__\w+__|\b(?:eval|exec|compile|open|import)\b")
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_settings() -> Tuple[Dict[str, Any], Tuple[Any, ...]]:
+    """文字列解析の設定（sympify と同じ変換を直接 parse_expr に渡し、変換器の探索を省く）
+    
+    SymPy の読み込みは重いため、最初に式を解析する時点まで遅らせる。
+    """
+    import sympy as sp
+    from sympy.parsing.sympy_parser import standard_transformations, convert_xor
+    local_dict = {name: sp.Symbol(name) for name in ("x", "y", "z", "t")}
+    return local_dict, standard_transformations + (convert_xor,)
+
+
+def _cached_sympify(expression: Any) -> Any:
+    """sympify の結果をメモリ（LRU）にキャッシュして再利用"""
+    if not isinstance(expression, str):
+        import sympy as sp
+        return sp.sympify(expression)
+    return _sympify_str(expression)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_symbol(name: str) -> Any:
+    """変数名から SymPy シンボルを生成（同じ名前は同じインスタンス）"""
+    import sympy as sp
+    return sp.symbols(name)
+
+
+@functools.lru_cache(maxsize=1024)
+def _sympify_str(expression: str) -> Any:
+    """文字列の sympify（SymPy 式は不変なので解析結果を共有できる）"""
+    import sympy as sp
+    from sympy.parsing.sympy_parser import parse_expr
+    local_dict, transformations = _parse_settings()
+    try:
+        expr = parse_expr(expression, local_dict=dict(local_dict),
+                          transformations=transformations, evaluate=True)
+    except Exception:  # 解析できない式は sympify に任せて従来どおりのエラーにする
+        expr = sp.sympify(expression)
+    return expr
+
+
+def _precheck_expression(expression: str) -> Optional[str]:
+    """式の事前チェック（問題があればエラーメッセージ、なければ None）"""
+    if not str(expression).strip():
+        return "式と操作の両方が必要です"
+    if _DANGEROUS_EXPRESSION_RE.search(str(expression)):
+        return "危険な式は許可されません"
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _integrate_by_parts_steps(expr: Any, var_symbol: Any) -> Tuple[str, str]:
+    """部分積分の手順テキストと最終結果の文字列（同じ式・変数の結果はキャッシュ）"""
+    import sympy as sp
+    expr_str = str(expr)
+    result_str = str(sp.integrate(expr, var_symbol))
+    
+    # 基本的な部分積分の説明
+    steps = [f"∫ {expr_str} d{var_symbol} の積分を部分積分で求めます。"]
+    
+    # x*sin(x)の場合の特別な処理
+    if expr_str == "x*sin(x)":
+        steps.extend([
+            "部分積分の公式: ∫ u dv = uv - ∫ v du",
+            "u = x なので du = dx",
+            "dv = sin(x) dx なので v = -cos(x)",
+            "∫ x sin(x) dx = x(-cos(x)) - ∫ (-cos(x)) dx",
+            "= -x cos(x) + ∫ cos(x) dx",
+            "= -x cos(x) + sin(x) + C"
+        ])
+    else:
+        steps.append(f"計算結果: {result_str} + C")
+    
+    steps.append(f"最終答: {result_str} + C （Cは積分定数）")
+    return "\n".join(steps), result_str
+
+
+@functools.lru_cache(maxsize=256)
+def _solve_steps(expr: Any, var_symbol: Any) -> Tuple[str, Tuple[Any, ...]]:
+    """段階的求解の手順テキストと解（同じ式・変数の結果はキャッシュ、解は共有のためタプル）"""
+    import sympy as sp
+    steps = [f"{expr} = 0 を解きます。"]
+    
+    # 因数分解を試行
+    factored = sp.factor(expr)
+    if factored != expr:
+        steps.append(f"因数分解: {factored} = 0")
+    
+    # 解を求める
+    solutions = sp.solve(expr, var_symbol)
+    steps.append(f"解: {var_symbol} = {solutions}")
+    return "\n".join(steps), tuple(solutions)
 
 
 class StepMathEngine(BaseTool):
@@ -61,28 +163,34 @@ class StepMathEngine(BaseTool):
             ]
         )
     
-    @traceable(name="step_math_execute")
     async def execute(self, **kwargs) -> ToolResult:
+        """非同期インターフェース（I/O を伴わないため同期版をそのまま呼ぶ）"""
+        return self.execute_sync(**kwargs)
+    
+    @traceable(name="step_math_execute")
+    def execute_sync(self, **kwargs) -> ToolResult:
+        """同期実行（SymPy の計算のみでコルーチンを挟まない）"""
         expression = kwargs.get("expression", "")
         operation = kwargs.get("operation", "")
         var_name = kwargs.get("var", "x")
         
-        if not expression or not operation:
+        error = _precheck_expression(expression) if operation else "式と操作の両方が必要です"
+        if error:
             return ToolResult(
                 success=False,
                 result=None,
-                error="式と操作の両方が必要です",
+                error=error,
                 metadata={"tool": "step_math", **kwargs}
             )
         
         try:
-            expr = sympify(expression)
-            var = symbols(var_name)
+            expr = _cached_sympify(expression)
+            var = _cached_symbol(var_name)
             
             if operation == "integrate_by_parts":
-                return await self._integrate_by_parts(expr, var, **kwargs)
+                return self._integrate_by_parts(expr, var, **kwargs)
             elif operation == "solve_step":
-                return await self._solve_step_by_step(expr, var, **kwargs)
+                return self._solve_step_by_step(expr, var, **kwargs)
             else:
                 return ToolResult(
                     success=False,
@@ -99,37 +207,15 @@ class StepMathEngine(BaseTool):
                 metadata={"tool": "step_math", **kwargs}
             )
     
-    async def _integrate_by_parts(self, expr, var_symbol, **kwargs) -> ToolResult:
+    def _integrate_by_parts(self, expr, var_symbol, **kwargs) -> ToolResult:
         """部分積分の詳細な手順を提供"""
         try:
-            # 基本的な部分積分の説明
-            steps = []
-            steps.append(f"∫ {expr} d{var_symbol} の積分を部分積分で求めます。")
-            
-            # 実際の積分計算
-            result = integrate(expr, var_symbol)
-            
-            # x*sin(x)の場合の特別な処理
-            if str(expr) == "x*sin(x)":
-                steps.extend([
-                    "部分積分の公式: ∫ u dv = uv - ∫ v du",
-                    "u = x なので du = dx",
-                    "dv = sin(x) dx なので v = -cos(x)",
-                    "∫ x sin(x) dx = x(-cos(x)) - ∫ (-cos(x)) dx",
-                    "= -x cos(x) + ∫ cos(x) dx",
-                    "= -x cos(x) + sin(x) + C"
-                ])
-            else:
-                steps.append(f"計算結果: {result} + C")
-            
-            steps.append(f"最終答: {result} + C （Cは積分定数）")
-            
-            detailed_result = "\n".join(steps)
+            detailed_result, final_result = _integrate_by_parts_steps(expr, var_symbol)
             
             return ToolResult(
                 success=True,
                 result=detailed_result,
-                metadata={"tool": "step_math", "final_result": str(result), **kwargs}
+                metadata={"tool": "step_math", "final_result": final_result, **kwargs}
             )
             
         except Exception as e:
@@ -140,27 +226,15 @@ class StepMathEngine(BaseTool):
                 metadata={"tool": "step_math", **kwargs}
             )
     
-    async def _solve_step_by_step(self, expr, var_symbol, **kwargs) -> ToolResult:
+    def _solve_step_by_step(self, expr, var_symbol, **kwargs) -> ToolResult:
         """段階的方程式求解"""
         try:
-            steps = []
-            steps.append(f"{expr} = 0 を解きます。")
-            
-            # 因数分解を試行
-            factored = factor(expr)
-            if factored != expr:
-                steps.append(f"因数分解: {factored} = 0")
-            
-            # 解を求める
-            solutions = solve(expr, var_symbol)
-            steps.append(f"解: {var_symbol} = {solutions}")
-            
-            detailed_result = "\n".join(steps)
+            detailed_result, solutions = _solve_steps(expr, var_symbol)
             
             return ToolResult(
                 success=True,
                 result=detailed_result,
-                metadata={"tool": "step_math", "solutions": solutions, **kwargs}
+                metadata={"tool": "step_math", "solutions": list(solutions), **kwargs}
             )
             
         except Exception as e:
@@ -172,6 +246,144 @@ class StepMathEngine(BaseTool):
             )
 
 
+@functools.lru_cache(maxsize=1024)
+def _compute_math(expression: str, operation: str, var_name: str,
+                  options: Tuple[Tuple[str, Any], ...]) -> Optional[str]:
+    """
+    数学操作を実行して結果を文字列で返す（同一引数の結果はキャッシュ）
+    
+    Args:
+        expression: 数学式
+        operation: 操作名
+        var_name: 変数名
+        options: その他の引数（キー順にソートした (名前, 値) のタプル）
+        
+    Returns:
+        結果の文字列。不明な操作の場合は None
+    """
+    # SymPy式として解析し、解析済みの式をキーにした結果キャッシュを引く
+    return _compute_math_parsed(_cached_sympify(expression), operation, _cached_symbol(var_name), options)
+
+
+def _compute_math_uncached(expression: str, operation: str, var_name: str,
+                           options: Tuple[Tuple[str, Any], ...]) -> Optional[str]:
+    """ハッシュ不可能な引数を含む場合の計算（結果はキャッシュしない）"""
+    return _run_math_operation(_cached_sympify(expression), operation, _cached_symbol(var_name), options)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compute_math_parsed(expr: Any, operation: str, var: Any,
+                         options: Tuple[Tuple[str, Any], ...]) -> Optional[str]:
+    """解析済みの式で計算（空白など表記だけが異なる式も同じ結果を再利用）"""
+    return _run_math_operation(expr, operation, var, options)
+
+
+def _symengine_apply(operation: str, expr: Any, *args: Any) -> Any:
+    """SymEngine で計算して SymPy 式に戻す（変換できない式は None）"""
+    if se is None:
+        return None
+    try:
+        se_expr = se.sympify(expr)
+        if operation == "diff":
+            var, order = args
+            result = se.diff(se_expr, *[se.sympify(var)] * int(order))
+        else:
+            result = se.expand(se_expr)
+        return result._sympy_()
+    except Exception:  # SymEngine 非対応の関数などは SymPy で計算
+        return None
+
+
+def _op_diff(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+    """微分"""
+    order = kwargs.get("order", 1)
+    result = _symengine_apply("diff", expr, var, order)
+    if result is None:
+        import sympy as sp
+        result = sp.diff(expr, var, order)
+    return result
+
+
+def _op_integrate(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+    """積分（lower と upper があれば定積分）"""
+    import sympy as sp
+    if "lower" in kwargs and "upper" in kwargs:
+        # 定積分
+        lower = _cached_sympify(kwargs["lower"])
+        upper = _cached_sympify(kwargs["upper"])
+        return sp.integrate(expr, (var, lower, upper))
+    # 不定積分
+    return sp.integrate(expr, var)
+
+
+def _op_expand(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+    """展開"""
+    # SymEngine の expand は exp(x + y) などを SymPy と異なる形にするため多項式に限る
+    result = _symengine_apply("expand", expr) if expr.is_polynomial() else None
+    if result is None:
+        import sympy as sp
+        result = sp.expand(expr)
+    return result
+
+
+def _op_limit(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+    """極限"""
+    import sympy as sp
+    point_str = kwargs.get("point", "0")
+    direction = kwargs.get("direction", "+-")
+    
+    # 特殊な点の処理
+    if point_str in ["oo", "inf"]:
+        point = sp.oo
+    elif point_str in ["-oo", "-inf"]:
+        point = -sp.oo
+    else:
+        point = _cached_sympify(point_str)
+    
+    return sp.limit(expr, var, point, direction)
+
+
+def _op_series(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+    """テイラー展開"""
+    point = _cached_sympify(kwargs.get("point", "0"))
+    return expr.series(var, point, kwargs.get("n", 6))
+
+
+def _sympy_op(name: str, with_var: bool) -> Any:
+    """引数が式（と変数）だけの SymPy 関数を呼ぶ操作を作る"""
+    def op(expr: Any, var: Any, kwargs: Dict[str, Any]) -> Any:
+        import sympy as sp
+        func = getattr(sp, name)
+        return func(expr, var) if with_var else func(expr)
+    op.__name__ = f"_op_{name}"
+    return op
+
+
+# 操作名 → 処理関数（各関数は (式, 変数, その他の引数) を受け取り SymPy の結果を返す）
+_MATH_OPERATIONS = {
+    "diff": _op_diff,
+    "integrate": _op_integrate,
+    "solve": _sympy_op("solve", with_var=True),
+    "expand": _op_expand,
+    "factor": _sympy_op("factor", with_var=False),
+    "simplify": _sympy_op("simplify", with_var=False),
+    "limit": _op_limit,
+    "series": _op_series,
+    "partial_fractions": _sympy_op("apart", with_var=True),
+    "roots": _sympy_op("roots", with_var=True),
+    "evaluate": _sympy_op("N", with_var=False),  # 数値評価
+}
+
+
+def _run_math_operation(expr: Any, operation: str, var: Any,
+                        options: Tuple[Tuple[str, Any], ...]) -> Optional[str]:
+    """解析済みの式に数学操作を適用して結果を文字列で返す（不明な操作は None）"""
+    handler = _MATH_OPERATIONS.get(operation)
+    if handler is None:
+        return None
+    return str(handler(expr, var, dict(options)))
+
+
 class MathEngine(BaseTool):
     """記号数学処理エンジン - S式エージェントの数学的推論コア"""
     
@@ -248,83 +460,54 @@ class MathEngine(BaseTool):
             ]
         )
     
-    @traceable(name="math_engine_execute")
     async def execute(self, **kwargs) -> ToolResult:
+        """非同期インターフェース（I/O を伴わないため同期版をそのまま呼ぶ）"""
+        return self.execute_sync(**kwargs)
+    
+    async def execute_batch(self, queries: List[Dict[str, Any]]) -> List[ToolResult]:
+        """独立した複数の問い合わせをプロセスプールで並列実行（結果は入力順）
+        
+        SymPy の計算は GIL を保持するため、スレッドではなくプロセスで並列化する。
+        """
+        if len(queries) < 2:
+            return [self.execute_sync(**query) for query in queries]
+        
+        pool = _get_math_pool()
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(pool, _execute_math_query, query) for query in queries
+        )))
+    
+    @traceable(name="math_engine_execute")
+    def execute_sync(self, **kwargs) -> ToolResult:
+        """同期実行（SymPy の計算のみでコルーチンを挟まない）"""
         expression = kwargs.get("expression", "")
         operation = kwargs.get("operation", "")
         var_name = kwargs.get("var", "x")
         
-        if not expression or not operation:
+        error = _precheck_expression(expression) if operation else "式と操作の両方が必要です"
+        if error:
             return ToolResult(
                 success=False,
                 result=None,
-                error="式と操作の両方が必要です",
+                error=error,
                 metadata={"tool": "math", **kwargs}
             )
         
+        # 式・操作・変数以外の引数（order, lower, upper など）をキャッシュキーに含める
+        options = tuple(sorted(
+            (key, value) for key, value in kwargs.items()
+            if key not in ("expression", "operation", "var")
+        ))
         try:
-            # SymPy式として解析
-            expr = sympify(expression)
-            var = symbols(var_name)
-            
-            # 操作に応じて処理
-            if operation == "diff":
-                order = kwargs.get("order", 1)
-                result = diff(expr, var, order)
-                
-            elif operation == "integrate":
-                if "lower" in kwargs and "upper" in kwargs:
-                    # 定積分
-                    lower = sympify(kwargs["lower"])
-                    upper = sympify(kwargs["upper"])
-                    result = integrate(expr, (var, lower, upper))
-                else:
-                    # 不定積分
-                    result = integrate(expr, var)
-                    
-            elif operation == "solve":
-                result = solve(expr, var)
-                
-            elif operation == "expand":
-                result = expand(expr)
-                
-            elif operation == "factor":
-                result = factor(expr)
-                
-            elif operation == "simplify":
-                result = simplify(expr)
-                
-            elif operation == "limit":
-                point_str = kwargs.get("point", "0")
-                direction = kwargs.get("direction", "+-")
-                
-                # 特殊な点の処理
-                if point_str in ["oo", "inf"]:
-                    point = sp.oo
-                elif point_str in ["-oo", "-inf"]:
-                    point = -sp.oo
-                else:
-                    point = sympify(point_str)
-                
-                result = limit(expr, var, point, direction)
-                
-            elif operation == "series":
-                point_str = kwargs.get("point", "0")
-                n = kwargs.get("n", 6)
-                point = sympify(point_str)
-                result = expr.series(var, point, n)
-                
-            elif operation == "partial_fractions":
-                result = apart(expr, var)
-                
-            elif operation == "roots":
-                result = roots(expr, var)
-                
-            elif operation == "evaluate":
-                # 数値評価
-                result = N(expr)
-                
-            else:
+            hash(options)
+            compute = _compute_math
+        except TypeError:  # ハッシュ不可能な引数はキャッシュせずに計算
+            compute = _compute_math_uncached
+        
+        try:
+            result_str = compute(expression, operation, var_name, options)
+            if result_str is None:
                 return ToolResult(
                     success=False,
                     result=None,
@@ -332,9 +515,6 @@ class MathEngine(BaseTool):
                     metadata={"tool": "math", **kwargs}
                 )
             
-            # 結果を文字列化
-            result_str = str(result)
-            
             return ToolResult(
                 success=True,
                 result=result_str,
@@ -350,6 +530,37 @@ class MathEngine(BaseTool):
             )
 
 
+# execute_batch 用のプロセスプール（全エンジンで1つを共有し、終了時に停止）
+_math_pool: Optional[ProcessPoolExecutor] = None
+_math_pool_lock = threading.Lock()
+
+
+def _get_math_pool() -> ProcessPoolExecutor:
+    """プロセスプールを初回利用時に作成（ワーカーは永続キャッシュを使わない）"""
+    global _math_pool
+    with _math_pool_lock:
+        if _math_pool is None:
+            _math_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _math_pool
+
+
+def _shutdown_math_pool() -> None:
+    """プロセスプールを停止（次の execute_batch で作り直す）"""
+    global _math_pool
+    with _math_pool_lock:
+        pool, _math_pool = _math_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(_shutdown_math_pool)
+
+
+def _execute_math_query(query: Dict[str, Any]) -> ToolResult:
+    """ワーカープロセスで1件の問い合わせを実行（pickle できるようモジュール直下に定義）"""
+    return MathEngine().execute_sync(**query)
+
+
 if __name__ == "__main__":
     # テスト実行
     async def test_math_engine():
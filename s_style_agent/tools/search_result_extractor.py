@@ -4,13 +4,72 @@
 検索APIの生データをLLMを使って必要な情報に抽出・要約
 """
 
+import functools
 import json
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Dict, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
-from langsmith import traceable
+from .base import traceable
 from ..config.settings import settings
 
 
+# 検索結果テキストの各行（Title / Description / URL / 空行）を1回の走査で分類する正規表現
+# 前後の空白は除き、値は1文字以上の非空白を含む場合のみ採用（str.strip() + startswith と同じ判定）
+_ENTRY_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:'
+    r'Title: (?P<title>.*?\S)'
+    r'|Description: (?P<description>.*?\S)'
+    r'|URL: (?P<url>.*?\S)'
+    r'|(?P<blank>)'
+    r')[^\S\n]*$',
+    re.MULTILINE
+)
+
+# 座標の抽出パターン（優先順、lat/lng 間の距離は上限付きで長文でのバックトラックを抑える）
+_COORD_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'緯度経度は\[([0-9.]+),([0-9.]+)\]',
+    r'lat.{0,40}?([0-9.]+).{0,40}?lng.{0,40}?([0-9.]+)',
+    r'([0-9.]+),([0-9.]+)',
+))
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_entries(text: str) -> Tuple[Dict[str, str], ...]:
+    """テキストからTitle, Description, URLのエントリを抽出（同一テキストの結果はキャッシュ）"""
+    entries = []
+    current_entry = {}
+    
+    for match in _ENTRY_LINE_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'title':
+            if current_entry:
+                entries.append(current_entry)
+            current_entry = {'title': match.group('title')}
+        elif kind == 'blank':
+            if current_entry:
+                entries.append(current_entry)
+                current_entry = {}
+        else:
+            current_entry[kind] = match.group(kind)
+    
+    # 最後のエントリを追加
+    if current_entry:
+        entries.append(current_entry)
+    
+    return tuple(entries)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_llm_client(base_url: str, model_name: str, api_key: str) -> ChatOpenAI:
+    """抽出用の LLM クライアント（同じ接続先・モデルではインスタンスと接続プールを共有）"""
+    return ChatOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        model=model_name,
+        temperature=0.1  # 事実抽出のため低めに設定
+    )
+
+
 class SearchResultExtractor:
     """検索結果抽出・要約クラス"""
     
@@ -20,12 +79,7 @@ class SearchResultExtractor:
         llm_base_url = llm_base_url or settings.llm.base_url
         model_name = model_name or settings.llm.model_name
         
-        self.llm = ChatOpenAI(
-            base_url=llm_base_url,
-            api_key=settings.llm.api_key,
-            model=model_name,
-            temperature=0.1  # 事実抽出のため低めに設定
-        )
+        self.llm = _get_llm_client(llm_base_url, model_name, settings.llm.api_key)
     
     @traceable(name="extract_search_info")
     def extract_information(self, query: str, search_result: Dict[str, Any]) -> str:
@@ -45,6 +99,20 @@ class SearchResultExtractor:
         except Exception as e:
             return f"検索結果の抽出でエラーが発生しました: {e}"
     
+    @traceable(name="extract_search_info_batch")
+    def extract_information_batch(self, queries: List[str], search_result: Dict[str, Any]) -> Dict[str, str]:
+        """同じ検索結果から複数クエリの情報を抽出（検索結果の解析は1回のみ）"""
+        try:
+            content = self._parse_search_result(search_result)
+            
+            if not content:
+                return {query: "検索結果が見つかりませんでした。" for query in queries}
+            
+            return {query: self._extract_with_llm(query, content) for query in queries}
+            
+        except Exception as e:
+            return {query: f"検索結果の抽出でエラーが発生しました: {e}" for query in queries}
+    
     def _parse_search_result(self, search_result: Dict[str, Any]) -> List[Dict[str, str]]:
         """検索結果を解析して構造化データに変換"""
         try:
@@ -73,33 +141,8 @@ class SearchResultExtractor:
     
     def _extract_entries_from_text(self, text: str) -> List[Dict[str, str]]:
         """テキストからTitle, Description, URLのエントリを抽出"""
-        entries = []
-        lines = text.split('\n')
-        
-        current_entry = {}
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                if current_entry:
-                    entries.append(current_entry.copy())
-                    current_entry = {}
-                continue
-            
-            if line.startswith('Title: '):
-                if current_entry:
-                    entries.append(current_entry.copy())
-                current_entry = {'title': line[7:]}
-            elif line.startswith('Description: '):
-                current_entry['description'] = line[13:]
-            elif line.startswith('URL: '):
-                current_entry['url'] = line[5:]
-        
-        # 最後のエントリを追加
-        if current_entry:
-            entries.append(current_entry)
-        
-        return entries
+        # キャッシュ済みの辞書は共有されるため、呼び出し側にはコピーを返す
+        return [dict(entry) for entry in _parse_entries(text)]
     
     @traceable(name="llm_extract_search_info")
     def _extract_with_llm(self, query: str, content: List[Dict[str, str]]) -> str:
@@ -164,17 +207,9 @@ class SearchResultExtractor:
     
     def _extract_coordinates(self, text: str) -> Optional[str]:
         """テキストから座標情報を抽出"""
-        import re
-        
         # 緯度経度パターンを検索
-        patterns = [
-            r'緯度経度は\[([0-9.]+),([0-9.]+)\]',
-            r'lat.*?([0-9.]+).*?lng.*?([0-9.]+)',
-            r'([0-9.]+),([0-9.]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _COORD_PATTERNS:
+            match = pattern.search(text)
             if match:
                 lat, lng = match.groups()
                 return f"緯度: {lat}, 経度: {lng}"
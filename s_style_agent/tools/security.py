@@ -4,13 +4,81 @@
 安全な計算実行とツール許可リスト管理
 """
 
+import ast
+import functools
 import re
 from typing import Any, Dict, List, Set, Union
 from asteval import Interpreter
-import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr
-from sympy import sympify, N, symbols, simplify, expand, factor, solve, diff, integrate
-from langsmith import traceable
+
+from .base import traceable
+
+
+# calc で許可しない文字列パターン（名前付きグループの一括正規表現で1回だけ走査）
+_FORBIDDEN_CALC_PATTERNS = (
+    r'__.*__',  # dunder attributes
+    r'import\s',
+    r'exec\s*\(',
+    r'eval\s*\(',
+    r'open\s*\(',
+    r'file\s*\(',
+    r'input\s*\(',
+    r'raw_input\s*\(',
+    r'compile\s*\(',
+    r'globals\s*\(',
+    r'locals\s*\(',
+    r'vars\s*\(',
+    r'dir\s*\(',
+    r'help\s*\(',
+)
+_FORBIDDEN_CALC_RE = re.compile(
+    "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(_FORBIDDEN_CALC_PATTERNS)),
+    re.IGNORECASE,
+)
+
+# 検証済みの四則演算式は CPython のバイトコードで直接実行する（それ以外は asteval）
+# べき乗・シフトは巨大な数を作れるため対象外にして asteval の上限チェックに任せる
+_FAST_CALC_FUNCTIONS = {
+    'abs': abs,
+    'round': round,
+    'min': min,
+    'max': max,
+    'divmod': divmod,
+}
+_FAST_CALC_NAMES = {
+    **_FAST_CALC_FUNCTIONS,
+    'pi': 3.141592653589793,
+    'e': 2.718281828459045,
+}
+_FAST_CALC_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.UAdd, ast.USub)
+
+
+def _is_fast_calc_node(node: ast.AST) -> bool:
+    """高速経路で実行してよいノードか（数値・許可名・四則演算・許可関数の呼び出しのみ）"""
+    if isinstance(node, (ast.Expression, ast.Load, ast.BinOp, ast.UnaryOp) + _FAST_CALC_OPERATORS):
+        return True
+    if isinstance(node, ast.Constant):
+        return type(node.value) in (int, float)
+    if isinstance(node, ast.Name):
+        return node.id in _FAST_CALC_NAMES
+    if isinstance(node, ast.Call):
+        return isinstance(node.func, ast.Name) and node.func.id in _FAST_CALC_FUNCTIONS and not node.keywords
+    return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_fast_calc(expression: str) -> Any:
+    """式をコードオブジェクトにコンパイル（高速経路の対象外なら None）"""
+    try:
+        tree = ast.parse(expression, mode='eval')
+        if not all(_is_fast_calc_node(node) for node in ast.walk(tree)):
+            return None
+        return compile(tree, '<calc>', 'eval')
+    except (SyntaxError, ValueError, RecursionError, MemoryError):  # 解析できない式は asteval に任せる
+        return None
+
+
+# ツール呼び出しとして扱わない特殊形式
+_SPECIAL_FORMS = frozenset({'seq', 'par', 'if', 'let', 'plan'})
 
 
 class SafeCalculator:
@@ -40,22 +108,7 @@ class SafeCalculator:
         )
         
         # 許可しない文字列パターン
-        self.forbidden_patterns = [
-            r'__.*__',  # dunder attributes
-            r'import\s',
-            r'exec\s*\(',
-            r'eval\s*\(',
-            r'open\s*\(',
-            r'file\s*\(',
-            r'input\s*\(',
-            r'raw_input\s*\(',
-            r'compile\s*\(',
-            r'globals\s*\(',
-            r'locals\s*\(',
-            r'vars\s*\(',
-            r'dir\s*\(',
-            r'help\s*\(',
-        ]
+        self.forbidden_patterns = list(_FORBIDDEN_CALC_PATTERNS)
     
     @traceable(name="safe_calculator_validate")
     def validate_expression(self, expression: str) -> tuple[bool, str]:
@@ -65,10 +118,13 @@ class SafeCalculator:
         if not expression:
             return False, "空の式は許可されません"
         
-        # 危険なパターンをチェック
-        for pattern in self.forbidden_patterns:
-            if re.search(pattern, expression, re.IGNORECASE):
-                return False, f"危険なパターンが検出されました: {pattern}"
+        # 危険なパターンをチェック（ヒットしたグループ名からパターンを特定）
+        # どのパターンも "__"・"("・"import" のいずれかを含むため、どれも無ければ正規表現を省略
+        suspicious = "__" in expression or "(" in expression or "import" in expression.lower()
+        match = suspicious and _FORBIDDEN_CALC_RE.search(expression)
+        if match:
+            pattern = _FORBIDDEN_CALC_PATTERNS[int(match.lastgroup[1:])]
+            return False, f"危険なパターンが検出されました: {pattern}"
         
         # 長すぎる式を拒否
         if len(expression) > 1000:
@@ -84,6 +140,16 @@ class SafeCalculator:
         if not is_valid:
             raise ValueError(f"計算式が無効です: {error_msg}")
         
+        # 四則演算のみの式はコンパイル済みコードで実行（例外時は asteval で同じエラー処理）
+        # （asteval 側で名前が再代入されている場合は asteval の値を優先）
+        code = _compile_fast_calc(expression.strip())
+        symtable = self.interpreter.symtable
+        if code is not None and all(symtable.get(name) == _FAST_CALC_NAMES[name] for name in code.co_names):
+            try:
+                return eval(code, {'__builtins__': {}}, _FAST_CALC_NAMES)
+            except Exception:
+                pass
+        
         try:
             # astevalで安全に実行
             result = self.interpreter.eval(expression)
@@ -121,13 +187,18 @@ class ToolWhitelist:
             'file-write',
             'system'
         }
+        
+        self._rebuild_index()
+    
+    def _rebuild_index(self) -> None:
+        """ツール名 → 管理者専用か の索引を作り直す（管理者専用が優先）"""
+        self._requires_admin = dict.fromkeys(self.allowed_tools, False)
+        self._requires_admin.update(dict.fromkeys(self.admin_only_tools, True))
     
     def is_allowed(self, tool_name: str, is_admin: bool = False) -> bool:
         """ツールが許可されているかチェック"""
-        if tool_name in self.admin_only_tools:
-            return is_admin
-        
-        return tool_name in self.allowed_tools
+        requires_admin = self._requires_admin.get(tool_name)
+        return requires_admin is not None and (is_admin or not requires_admin)
     
     def add_tool(self, tool_name: str, admin_only: bool = False) -> None:
         """ツールを許可リストに追加"""
@@ -135,11 +206,13 @@ class ToolWhitelist:
             self.admin_only_tools.add(tool_name)
         else:
             self.allowed_tools.add(tool_name)
+        self._rebuild_index()
     
     def remove_tool(self, tool_name: str) -> None:
         """ツールを許可リストから削除"""
         self.allowed_tools.discard(tool_name)
         self.admin_only_tools.discard(tool_name)
+        self._rebuild_index()
     
     def list_allowed_tools(self, is_admin: bool = False) -> List[str]:
         """許可されたツール一覧を取得"""
@@ -160,43 +233,37 @@ class SecurityValidator:
     def validate_s_expression(self, s_expr: Any, is_admin: bool = False) -> tuple[bool, str]:
         """S式全体のセキュリティ検証"""
         try:
-            return self._validate_recursive(s_expr, is_admin)
+            return self._validate_iterative(s_expr, is_admin)
         except Exception as e:
             return False, f"セキュリティ検証エラー: {str(e)}"
     
-    def _validate_recursive(self, expr: Any, is_admin: bool) -> tuple[bool, str]:
-        """再帰的にS式を検証"""
-        if isinstance(expr, str):
-            # 文字列は基本的に安全
-            return True, ""
-        
-        if not isinstance(expr, list):
-            # アトム（数値など）は安全
-            return True, ""
-        
-        if len(expr) == 0:
-            return True, ""
-        
-        op = expr[0]
-        
-        # ツール呼び出しの場合
-        if isinstance(op, str) and not op in ['seq', 'par', 'if', 'let', 'plan']:
-            if not self.whitelist.is_allowed(op, is_admin):
-                return False, f"ツール '{op}' は許可されていません"
-        
-        # 計算式の特別検証
-        if op == 'calc' and len(expr) > 1:
-            calc_expr = expr[1]
-            if isinstance(calc_expr, str):
-                is_valid, error_msg = self.calculator.validate_expression(calc_expr)
-                if not is_valid:
-                    return False, f"calc式が無効: {error_msg}"
-        
-        # 再帰的に子要素を検証
-        for arg in expr[1:]:
-            is_valid, error_msg = self._validate_recursive(arg, is_admin)
-            if not is_valid:
-                return False, error_msg
+    def _validate_iterative(self, expr: Any, is_admin: bool) -> tuple[bool, str]:
+        """S式を明示スタックで反復的に検証（深いS式でも関数呼び出しを積まない）"""
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            
+            # 文字列・数値などのアトムや空リストは安全
+            if not isinstance(node, list) or not node:
+                continue
+            
+            op = node[0]
+            
+            # ツール呼び出しの場合
+            if isinstance(op, str) and op not in _SPECIAL_FORMS:
+                if not self.whitelist.is_allowed(op, is_admin):
+                    return False, f"ツール '{op}' は許可されていません"
+            
+            # 計算式の特別検証
+            if op == 'calc' and len(node) > 1:
+                calc_expr = node[1]
+                if isinstance(calc_expr, str):
+                    is_valid, error_msg = self.calculator.validate_expression(calc_expr)
+                    if not is_valid:
+                        return False, f"calc式が無効: {error_msg}"
+            
+            # 先頭の子要素から検証されるよう逆順に積む（エラー順序は再帰版と同じ）
+            stack.extend(reversed(node[1:]))
         
         return True, ""
 
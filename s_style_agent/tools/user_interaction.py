@@ -6,9 +6,8 @@ Human-in-the-loop処理を提供する包括的なツール群
 
 import asyncio
 from typing import Any, Dict, List, Optional, Union
-from langsmith import traceable
 
-from .base import BaseTool, ToolSchema, ToolParameter, ToolResult
+from .base import BaseTool, ToolSchema, ToolParameter, ToolResult, traceable
 
 
 class AskUserTool(BaseTool):
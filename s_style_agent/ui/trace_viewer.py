@@ -4,7 +4,7 @@ S式実行トレースビューア（Textualベース）
 リアルタイムでS式評価の実行状況を表示するTUIアプリケーション
 """
 
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from pathlib import Path
 import json
 import time
@@ -28,6 +28,18 @@ from ..core.parser import parse_s_expression
 from ..core.evaluator import ContextualEvaluator, Environment
 
 
+# 実行状態 → 絵文字
+_STATUS_EMOJI = {
+    "pending": "⚪",  # 待機中
+    "running": "🟡",  # 実行中
+    "completed": "🟢",  # 完了
+    "error": "🔴"     # エラー
+}
+
+# 折りたたみ時の可視子ノード（共有の空タプル）
+_EMPTY_CHILDREN: Tuple['ExpandableTraceNode', ...] = ()
+
+
 class ExpandableTraceNode:
     """S式実行トレースの展開可能ノード（NEXT_PHASE_PLANに従った設計）"""
     
@@ -39,7 +51,7 @@ class ExpandableTraceNode:
         self.execution_status = "pending"  # pending, running, completed, error
         self.duration_ms = 0
         self.result = None
-        self.path: List[int] = []  # ツリー内でのパス
+        self.path: Tuple[int, ...] = ()  # ツリー内でのパス
         self.depth = 0
         
         # トレース情報
@@ -49,19 +61,29 @@ class ExpandableTraceNode:
         # UI状態
         self.textual_node = None  # TextualのTreeNodeへの参照
         self.parent_node = None
+        
+        # find_node_by_path の検索結果キャッシュ（このノードからの相対パス → ノード）
+        self._path_cache: Dict[Tuple[int, ...], 'ExpandableTraceNode'] = {}
+        
+        # 表示用の絵文字・ラベル（状態変更時に再計算）
+        self._refresh_display()
     
     def add_child(self, child: 'ExpandableTraceNode'):
         """子ノードを追加"""
         child.parent_node = self
         child.depth = self.depth + 1
-        child.path = self.path + [len(self.children)]
+        child.path = self.path + (len(self.children),)
         self.children.append(child)
+        self._refresh_display()
+        
+        # 追加は末尾のみで既存パスは変わらず、パス検索キャッシュはヒットのみ保持するため無効化は不要
         return child
     
     def toggle_expansion(self):
         """展開/折りたたみを切り替え"""
         old_state = self.is_expanded
         self.is_expanded = not self.is_expanded
+        self._refresh_display()
         
         # デバッグログ（必要時のみ）
         try:
@@ -82,52 +104,46 @@ class ExpandableTraceNode:
         self.execution_status = status
         self.duration_ms = duration_ms
         self.result = result
+        self._refresh_display()
     
-    @property
-    def status_emoji(self) -> str:
-        """実行状態の絵文字"""
-        status_map = {
-            "pending": "⚪",  # 待機中
-            "running": "🟡",  # 実行中
-            "completed": "🟢",  # 完了
-            "error": "🔴"     # エラー
-        }
-        return status_map.get(self.execution_status, "❓")
-    
-    @property
-    def expansion_emoji(self) -> str:
-        """展開状態の絵文字"""
+    def _refresh_display(self):
+        """status_emoji / expansion_emoji / display_label / visible_child_count を再計算"""
+        self.visible_child_count = len(self.children) if self.is_expanded else 0
+        self.status_emoji = _STATUS_EMOJI.get(self.execution_status, "❓")
+        
         if not self.children:
-            return "  "  # 子ノードなしは空白
-        return "▼" if self.is_expanded else "▶"
-    
-    @property
-    def display_label(self) -> str:
-        """表示用ラベル"""
+            self.expansion_emoji = "  "  # 子ノードなしは空白
+        else:
+            self.expansion_emoji = "▼" if self.is_expanded else "▶"
+        
         duration_text = f" ({self.duration_ms:.1f}ms)" if self.duration_ms > 0 else ""
-        expansion = self.expansion_emoji
-        status = self.status_emoji
         
         # S式を適切に短縮
         s_expr_display = self.s_expr
         if len(s_expr_display) > 60:
             s_expr_display = s_expr_display[:57] + "..."
         
-        return f"{expansion} {status} {self.operation}: {s_expr_display}{duration_text}"
+        self.display_label = f"{self.expansion_emoji} {self.status_emoji} {self.operation}: {s_expr_display}{duration_text}"
     
-    def get_visible_children(self) -> List['ExpandableTraceNode']:
-        """展開されている場合のみ子ノードを返す"""
-        return self.children if self.is_expanded else []
+    def get_visible_children(self) -> Sequence['ExpandableTraceNode']:
+        """展開されている場合のみ子ノードを返す（コピーせず、折りたたみ時は空タプル）"""
+        return self.children if self.is_expanded else _EMPTY_CHILDREN
     
     def find_node_by_path(self, path: List[int]) -> Optional['ExpandableTraceNode']:
         """パスを指定してノードを検索"""
-        if not path:
-            return self
-            
-        if path[0] >= len(self.children):
-            return None
-            
-        return self.children[path[0]].find_node_by_path(path[1:])
+        key = tuple(path)
+        cached = self._path_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        node = self
+        for index in key:
+            if index >= len(node.children):
+                return None
+            node = node.children[index]
+        
+        self._path_cache[key] = node
+        return node
     
     def collect_all_descendants(self) -> List['ExpandableTraceNode']:
         """すべての子孫ノードを収集（展開状態に関係なく）"""
@@ -161,8 +177,9 @@ class ExpandableTraceNode:
         node.is_expanded = data.get("is_expanded", True)
         node.execution_status = data.get("execution_status", "pending")
         node.duration_ms = data.get("duration_ms", 0)
-        node.path = data.get("path", [])
+        node.path = tuple(data.get("path", ()))
         node.depth = data.get("depth", 0)
+        node._refresh_display()
         
         # 子ノードを再帰的に復元
         for child_data in data.get("children", []):
@@ -170,6 +187,104 @@ class ExpandableTraceNode:
             node.add_child(child)
         
         return node
+    
+    def to_packed(self) -> List[list]:
+        """
+        フラットなレコード列にシリアライズ（前順走査、再帰なし）
+        
+        各レコードは [operation, s_expr, is_expanded, execution_status,
+        duration_ms, result, child_count] で、子ノードは親の直後に並ぶ
+        """
+        records = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            records.append([
+                node.operation,
+                node.s_expr,
+                node.is_expanded,
+                node.execution_status,
+                node.duration_ms,
+                str(node.result) if node.result is not None else None,
+                len(node.children)
+            ])
+            stack.extend(reversed(node.children))
+        return records
+    
+    @classmethod
+    def from_packed(cls, records: List[list]) -> Optional['ExpandableTraceNode']:
+        """to_packed のレコード列から復元"""
+        root = None
+        stack = []  # [親ノード, 未処理の子ノード数]
+        for operation, s_expr, is_expanded, status, duration_ms, result, child_count in records:
+            node = cls(operation=operation, s_expr=s_expr)
+            node.is_expanded = is_expanded
+            node.execution_status = status
+            node.duration_ms = duration_ms
+            node.result = result
+            node._refresh_display()
+            
+            if stack:
+                frame = stack[-1]
+                frame[0].add_child(node)
+                frame[1] -= 1
+                if frame[1] == 0:
+                    stack.pop()
+            else:
+                root = node
+            
+            if child_count:
+                stack.append([node, child_count])
+        
+        return root
+
+
+def _entry_s_expr(entry: TraceEntry) -> str:
+    """トレースエントリからS式文字列を抽出"""
+    if entry.s_expr is not None:
+        return entry.s_expr
+    if isinstance(entry.input, dict) and "s_expr" in entry.input:
+        return str(entry.input["s_expr"])
+    elif isinstance(entry.input, list) and len(entry.input) > 0:
+        if len(entry.input) == 1:
+            return f"({entry.input[0]})"
+        else:
+            args = " ".join(str(arg) for arg in entry.input[1:])
+            return f"({entry.input[0]} {args})"
+    else:
+        return str(entry.input)
+
+
+def build_tree(entries: List[TraceEntry],
+               root: Optional[ExpandableTraceNode] = None) -> ExpandableTraceNode:
+    """トレースエントリ列から ExpandableTraceNode ツリーを1パスで構築
+    
+    パス長でソートしてから path→ノード の索引で親を引くため、
+    エントリの出現順に依存せず O(n log n) で組み上がる。
+    親が見つからないエントリはルート直下に置く。
+    """
+    if root is None:
+        root = ExpandableTraceNode("root", "S式実行ルート")
+    
+    by_path: Dict[tuple, ExpandableTraceNode] = {(): root}
+    for entry in sorted(entries, key=lambda e: len(e.path)):
+        key = tuple(entry.path)
+        parent = by_path.get(key[:-1], root) if key else root
+        
+        node = ExpandableTraceNode(entry.operation, _entry_s_expr(entry))
+        node.trace_entry = entry
+        if entry.metadata.error is not None:
+            status = "error"
+        elif entry.output is not None or entry.duration_ms > 0:
+            status = "completed"
+        else:
+            status = "running"
+        node.set_execution_status(status, entry.duration_ms, entry.output)
+        
+        parent.add_child(node)
+        by_path[key] = node
+    
+    return root
 
 
 class TraceViewer(App):
@@ -535,16 +650,7 @@ class TraceViewer(App):
     
     def extract_s_expr_from_entry(self, entry: TraceEntry) -> str:
         """トレースエントリからS式文字列を抽出"""
-        if isinstance(entry.input, dict) and "s_expr" in entry.input:
-            return str(entry.input["s_expr"])
-        elif isinstance(entry.input, list) and len(entry.input) > 0:
-            if len(entry.input) == 1:
-                return f"({entry.input[0]})"
-            else:
-                args = " ".join(str(arg) for arg in entry.input[1:])
-                return f"({entry.input[0]} {args})"
-        else:
-            return str(entry.input)
+        return _entry_s_expr(entry)
     
     def refresh_textual_tree(self) -> None:
         """TextualのTreeウィジェットを更新"""